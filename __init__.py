@@ -30,15 +30,35 @@ import struct
 import binascii
 import random
 import time
-import knx
-import xml.etree.ElementTree as ET
+import hashlib
 import sys
+import threading
+import zlib
+
+try:
+    import knx
+except ImportError:
+    knx = None
 
 from lib.item import Items
 from lib.model.smartplugin import *
 from cherrypy.lib import static
 
 from . import dpts
+from . import knxprod
+from .dispatch import Dispatcher
+from .sendqueue import SendScheduler, PRIORITY_HIGH, PRIORITY_NORMAL
+from .poll import PollScheduler
+from .initread import InitReader
+from .valuecache import ValueCache
+from .clock import CLOCK_GOS, ClockObject, ClockSender
+from .metrics import LatencyHistogram
+from .trace import Tracer, RX, TX
+from . import knxsim
+from .stackproc import ProcessStack
+from . import recorder
+from .replay import Replayer
+from .batch import Batcher
 
 KNX_DPT      = 'knx_dpt'          # data point type
 KNX_STATUS   = 'knx_status'       # status
@@ -50,6 +70,124 @@ KNX_DTP      = 'knx_dtp'          # often misspelled argument in config files, i
 KNX_GO       = 'knx_go'
 KNX_CACHE    = 'knx_cache'
 KNX_INIT     = 'knx_init'
+KNX_MIN_INTERVAL = 'knx_min_interval'   # minimum time in seconds between two telegrams of a GO
+KNX_SEND_ON_CHANGE_ONLY = 'knx_send_on_change_only'   # do not send values equal to the last one
+KNX_REFRESH_INTERVAL = 'knx_refresh_interval'         # send an unchanged value again after this many seconds
+KNX_INIT_PRIORITY = 'knx_init_priority'               # order of the initial reads done by the plugin
+KNX_SHARD = 'knx_shard'                               # shard index of the instance the item belongs to
+
+# the native knx module holds a single device per process
+_nativeStackOwner = None
+
+# files of the device below var/knx_ets, see migrateFiles()
+DEVICE_FILES = ('flash.bin', 'smarthomeNG.xml', 'smarthomeNG.fingerprint', 'smarthomeNG.gomap',
+                'smarthomeNG.gochanges', 'smarthomeNG.values')
+
+# line markers of the smarthomeNG.gochanges file. 'reused' are the numbers given to new items since the last ETS
+# download, over all versions in between
+GO_CHANGE_SIGNS = (('-', 'removed'), ('+', 'added'), ('*', 'changed'), ('!', 'reused'))
+
+# number of locks the GO state of the bindings is spread over
+LOCK_STRIPES = 64
+
+
+def goRanges(goNrs):
+    """
+    :return: the GO numbers as a string with ranges, e.g. '1-3, 7'
+    """
+    ranges = []
+    for goNr in sorted(goNrs):
+        if ranges and ranges[-1][1] == goNr - 1:
+            ranges[-1][1] = goNr
+        else:
+            ranges.append([goNr, goNr])
+    return ", ".join(str(first) if first == last else "{}-{}".format(first, last) for first, last in ranges)
+
+
+def goIdentifiers(item, goCount):
+    """
+    :return: the ComObject texts of the GOs of item
+    """
+    identifier = str(item.id())
+    return tuple(identifier if i == 0 else identifier + "_" + str(i) for i in range(goCount))
+
+
+class ItemBinding:
+    """
+    Everything the telegram hot paths need to know about an item, resolved
+    once in parse_item instead of on every telegram.
+    """
+    __slots__ = ('item', 'dpt', 'encoder', 'encoderInto', 'buffer', 'decoder', 'size', 'payloadStart',
+                 'identifiers', 'send', 'listen', 'reply', 'init', 'cache', 'priority', 'minInterval',
+                 'onChangeOnly', 'refreshInterval', 'pollInterval', 'groupObjects', 'entries', 'mainGoNr', 'lock',
+                 'cacheHits', 'cacheMisses')
+
+    def __init__(self, item, dpt, goCount):
+        self.item = item
+        self.dpt = dpt
+        self.encoder = dpts.encode[dpt]
+        self.decoder = dpts.decode[dpt]
+        self.size = dpts.sizes[dpt]
+        self.payloadStart = dpts.payloadStart[dpt]
+        # encode buffer reused for every write, all GOs of the item share the value. It has the length of the
+        # encoded value, so the value is copied out of it whole
+        self.encoderInto = dpts.encodeInto.get(dpt)
+        self.buffer = bytearray(dpts.encodedSizes.get(dpt, 0))
+        self.identifiers = goIdentifiers(item, goCount)
+        self.send = False
+        self.listen = False
+        self.reply = False
+        self.init = False
+        self.cache = False
+        # switching telegrams are sent before everything else
+        self.priority = PRIORITY_HIGH if dpt in ('1', '2', '3') else PRIORITY_NORMAL
+        self.minInterval = 0
+        self.onChangeOnly = False
+        self.refreshInterval = 0
+        self.pollInterval = 0
+        self.groupObjects = []
+        self.entries = []
+        # GO number of the first identifier, 0 while it has none
+        self.mainGoNr = 0
+        # guards lastRaw, the counters and the GO values of all entries, assigned in buildGoTable()
+        self.lock = None
+        self.cacheHits = 0
+        self.cacheMisses = 0
+
+    @property
+    def goCount(self):
+        return len(self.identifiers)
+
+
+class GoEntry:
+    """
+    Entry of the GO table, which is a list indexed by GO number
+    """
+    __slots__ = ('goNr', 'binding', 'siblings', 'groupObject', 'fanout', 'lastRaw', 'lastSendTime', 'sendDropped',
+                 'rx', 'tx', 'rxBytes', 'txBytes', 'decodeErrors', 'lastSeen', 'changedAt', 'traced')
+
+    def __init__(self, goNr, binding):
+        self.goNr = goNr
+        self.binding = binding
+        self.siblings = ()
+        # stack handles, resolved in run() once the stack memory is loaded
+        self.groupObject = None
+        self.fanout = ()
+        # payload of the last value received or handed over for sending, without the leading byte of the encoders
+        self.lastRaw = None
+        self.lastSendTime = 0
+        # the send scheduler dropped the value last handed over, so lastRaw was never sent
+        self.sendDropped = False
+        # telegram counters, only counted with enable_stats
+        self.rx = 0
+        self.tx = 0
+        self.rxBytes = 0
+        self.txBytes = 0
+        self.decodeErrors = 0
+        self.lastSeen = None
+        # perf_counter of the item change waiting to be written, 0 if none
+        self.changedAt = 0
+        self.traced = False
 
 
 class KnxEts(SmartPlugin):
@@ -63,27 +201,152 @@ class KnxEts(SmartPlugin):
         self.alive = False
         self.gosRegistered = False
 
-        self.knxprodPath = smarthome.base_dir + '/var/knx_ets/smarthomeNG.xml'
-        self.goItemMapping = {}
-        self.items = []
+        self.templatePath = smarthome.base_dir + '/plugins/knx_ets/assets/smarthomeNG.xml'
+        # every instance is a device of its own with its own files
+        self.varDir = smarthome.base_dir + '/var/knx_ets/'
+        if self.get_instance_name():
+            self.varDir += self.get_instance_name() + '/'
+        self.knxprodPath = self.varDir + 'smarthomeNG.xml'
+        self.fingerprintPath = self.varDir + 'smarthomeNG.fingerprint'
+        self.goMapPath = self.varDir + 'smarthomeNG.gomap'
+        self.goChangesPath = self.varDir + 'smarthomeNG.gochanges'
+        self.valueCachePath = self.varDir + 'smarthomeNG.values'
+        self.migrateFiles(smarthome.base_dir + '/var/knx_ets/')
+        self.shards = max(1, self.get_parameter_value('shards') or 1)
+        self.shardIndex = self.get_parameter_value('shard_index') or 0
+        if not 0 <= self.shardIndex < self.shards:
+            self.logger.error("shard_index {} of instance '{}' must be from 0 to shards - 1 ({})".format(
+                self.shardIndex, self.get_instance_name(), self.shards - 1))
+            self._init_complete = False
+            return
+        self.maxGos = self.get_parameter_value('max_gos')
+        self.goCount = 0
+        # texts of the GOs of items ignored because of max_gos
+        self.rejectedIdentifiers = set()
+        self.goTexts = {}
+        # GOs added, removed and changed by the last knxprod version, see generateKnxProd
+        self.goChanges = {'version': None, 'added': [], 'removed': [], 'changed': [], 'reused': []}
+        # reused GO numbers the device may still link to the group addresses of their former items
+        self.unboundGos = set()
+        self.goTable = []
+        self.locks = tuple(threading.Lock() for i in range(LOCK_STRIPES))
+        self.bindings = []
+        # an item can be bound to several instances, so the binding is kept here instead of on the item
+        self.bindingsByItem = {}
+        self.bindingsByText = {}
+        self.decodeTables = self.get_parameter_value('decode_tables')
+
+        # prefix of the names of the threads of this instance, also used in their log messages
+        self.threadName = 'knx_ets' + ('.' + self.get_instance_name() if self.get_instance_name() else '')
+        self.dispatcher = None
+        if self.get_parameter_value('dispatch_workers'):
+            self.dispatcher = Dispatcher(self.dispatched, self.get_parameter_value('dispatch_workers'),
+                                         self.get_parameter_value('dispatch_queue_size'),
+                                         self.get_parameter_value('dispatch_drop'), self.threadName)
+        self.sendScheduler = None
+        self.batcher = None
+        if self.get_parameter_value('batch_window'):
+            self.batcher = Batcher(self.sendBindings, self.get_parameter_value('batch_window') / 1000, self.threadName)
+        self.sendOnChangeOnly = self.get_parameter_value('send_on_change_only')
+        self.poller = None
+        # with 'plugin' the initial reads are done by the plugin instead of the ReadOnInit flag
+        self.initReads = self.get_parameter_value('init_reads')
+        self.initReader = None
+        self.valueCache = None
+        self.stats = self.get_parameter_value('enable_stats')
+        # callback to item set and item change to GO write
+        self.receiveLatency = LatencyHistogram()
+        self.sendLatency = LatencyHistogram()
+        self.tracer = Tracer(self.get_parameter_value('trace_size'))
+        self.traceSelection = [str(selected) for selected in self.get_parameter_value('trace') or []]
+        self.clock = None
+        if self.get_parameter_value('send_time'):
+            self.addClockBindings()
         
+        self.telegramLog = None
+        self.replayer = None
+        # the stand-in module needs no hardware, for benchmarks and replays
+        if self.get_parameter_value('stack') == 'simulated':
+            self.knx = knxsim.Stack()
+        elif self.get_parameter_value('stack') == 'process':
+            # a child process per instance, so instances do not share the native module
+            self.knx = ProcessStack(self.get_parameter_value('process_ring_size'), self.threadName)
+        elif knx is None:
+            self.logger.error("The knx module is not installed, use stack: simulated to run without it")
+            self._init_complete = False
+            return
+        else:
+            global _nativeStackOwner
+            if _nativeStackOwner is not None:
+                self.logger.error("The knx module is already used by instance '{}', only one instance per process "
+                                  "can use stack: native".format(_nativeStackOwner))
+                self._init_complete = False
+                return
+            _nativeStackOwner = self.get_instance_name()
+            self.knx = knx
+
         args = sys.argv
         args.insert(0, sys.executable)
-        knx.Prepare(args)
+        self.knx.Prepare(args)
         
-        self.flashFilePath = smarthome.base_dir + '/var/knx_ets/flash.bin'
+        self.flashFilePath = self.varDir + 'flash.bin'
         self.ensure_dir(self.flashFilePath)
-        knx.FlashFilePath(self.flashFilePath)
-
-        ET.register_namespace('',"http://knx.org/xml/project/11")
-        ET.register_namespace('xsi',"http://www.w3.org/2001/XMLSchema-instance")
-        ET.register_namespace('xsd',"http://www.w3.org/2001/XMLSchema")
+        self.knx.FlashFilePath(self.flashFilePath)
 
         if not self.init_webinterface():
             self._init_complete = False
         
         return
 
+    def has_iattr(self, conf, attr):
+        # shards share the items, so they also accept the attributes without @instance
+        if super().has_iattr(conf, attr):
+            return True
+        return self.shards > 1 and attr in conf
+
+    def get_iattr_value(self, conf, attr):
+        if super().has_iattr(conf, attr) or self.shards == 1:
+            return super().get_iattr_value(conf, attr)
+        return conf.get(attr)
+
+    def inShard(self, item):
+        """
+        Items with the attributes of this instance belong to it. The shard of the others is knx_shard if set,
+        otherwise the crc32 of the item path.
+        """
+        if self.shards == 1:
+            return True
+        if super().has_iattr(item.conf, KNX_DPT):
+            if super().has_iattr(item.conf, KNX_SHARD) and \
+                    int(super().get_iattr_value(item.conf, KNX_SHARD)) != self.shardIndex:
+                self.logger.error("Ignoring {}: its knx_shard {} is not the shard_index {} of instance '{}'".format(
+                    item, super().get_iattr_value(item.conf, KNX_SHARD), self.shardIndex,
+                    self.get_instance_name()))
+                return False
+            return True
+        if self.has_iattr(item.conf, KNX_SHARD):
+            shard = int(self.get_iattr_value(item.conf, KNX_SHARD))
+            if not 0 <= shard < self.shards and self.shardIndex == 0:
+                self.logger.error("Ignoring {}: knx_shard {} is not below shards {}".format(item, shard, self.shards))
+            return shard == self.shardIndex
+        return zlib.crc32(str(item.id()).encode()) % self.shards == self.shardIndex
+
+    def migrateFiles(self, oldDir):
+        """
+        Move the files of a named instance from oldDir, where all instances kept them before every instance got
+        a directory of its own, so the device keeps its programming and GO numbers
+        """
+        if not self.get_instance_name() or os.path.exists(self.varDir):
+            return
+        files = [name for name in DEVICE_FILES if os.path.isfile(oldDir + name)]
+        if not files:
+            return
+        os.makedirs(self.varDir)
+        for name in files:
+            os.replace(oldDir + name, self.varDir + name)
+        self.logger.info("Moved {} of instance '{}' from {} to {}".format(
+            ", ".join(files), self.get_instance_name(), oldDir, self.varDir))
+
     def ensure_dir(self, file_path):
         directory = os.path.dirname(file_path)
         if not os.path.exists(directory):
@@ -98,23 +361,77 @@ class KnxEts(SmartPlugin):
     def updated(self, groupObject):
         rawValue = groupObject.value
         goNr = groupObject.asap()
-     
-        item = self.goItemMapping[goNr]
 
-        self.logger.debug("updated " + str(goNr) + " " + str(item) + " #gos " + str(len(item.GroupObjects)))
-
-        if item is None:
+        entry = self.goTable[goNr]
+        if entry is None:
             return
 
-        for goNr in item.GroupObjects:
-            groupObject = knx.GetGroupObject(goNr)
-            if groupObject.asap() != goNr:
-                groupObject.value = rawValue 
+        if self.telegramLog is not None:
+            self.telegramLog.record(goNr, recorder.RX, rawValue)
+        received = time.perf_counter() if self.stats else 0
+
+        binding = entry.binding
+        with binding.lock:
+            if received:
+                entry.rx += 1
+                entry.rxBytes += len(rawValue)
+                entry.lastSeen = time.time()
+            entry.lastRaw = rawValue
+            for sibling in entry.fanout:
+                sibling.lastRaw = rawValue
+                sibling.groupObject.value = rawValue
+            if self.valueCache is not None and binding.cache:
+                self.valueCache.put(binding.mainGoNr, rawValue)
+
+        if self.poller is not None:
+            self.poller.answered(entry)
+        if self.initReader is not None:
+            self.initReader.answer(entry)
+
+        # item triggers and logics run in the dispatcher threads, not in the stack thread
+        if self.dispatcher is None:
+            self.setItem(entry, rawValue, received)
+        else:
+            self.dispatcher.put(goNr, (rawValue, received))
+
+    def dispatched(self, goNr, value):
+        rawValue, received = value
+        entry = self.goTable[goNr]
+        # the item was sent or another GO of it received since, setting the older value would undo that
+        if entry.lastRaw != rawValue:
+            return
+        self.setItem(entry, rawValue, received)
 
-        dpt = self.get_iattr_value( item.conf, KNX_DPT)
-        value = self.decode(rawValue, dpt)
+    def setItem(self, entry, rawValue, received):
+        binding = entry.binding
+        try:
+            value = binding.decoder(rawValue)
+        except Exception:
+            value = None
+        if entry.traced:
+            self.tracer.add(entry.goNr, RX, rawValue, value)
+        if value is None:
+            # setting None would not change the item anyway
+            with binding.lock:
+                entry.decodeErrors += 1
+            return
 
-        item(value, "knx_ets")
+        # the item is set without the lock, its triggers may change other items of the plugin. A value sent or
+        # received meanwhile may have reached the item before this older one, then the newer value is set again
+        while True:
+            binding.item(value, "knx_ets")
+            with binding.lock:
+                if entry.lastRaw == rawValue:
+                    break
+                rawValue = entry.lastRaw
+            try:
+                value = binding.decoder(rawValue)
+            except Exception:
+                value = None
+            if value is None:
+                break
+        if received:
+            self.receiveLatency.add(time.perf_counter() - received)
 
     def run(self):
         """
@@ -122,30 +439,78 @@ class KnxEts(SmartPlugin):
         """
         self.generateKnxProd()
 
-        self.buildGoItemMapping()
-
-        if len(self.goItemMapping) == 0:
+        if len(self.goTexts) == 0:
             return None
 
-        if len(self.goItemMapping.keys()) != max(self.goItemMapping.keys()):
-            self.logger.error("GO-numbers must be continous starting from 1")
-            return None
-        self.logger.debug(knx.FlashFilePath()) 
-        knx.ReadMemory()
-        if knx.Configured():
+        self.buildGoTable()
+        self.setTrace(self.traceSelection)
+
+        if self.clock is not None:
+            for name, dpt, parameter in CLOCK_GOS:
+                binding = self.clock.bindings.get(dpt)
+                if binding is not None and binding.mainGoNr:
+                    self.logger.info("GO {} sends the {}, link it to {} in ETS".format(
+                        binding.mainGoNr, name, self.get_parameter_value(parameter)))
+
+        self.logger.debug(self.knx.FlashFilePath()) 
+        self.knx.ReadMemory()
+        if self.knx.Configured():
             self.logger.info("knx configured")
-            for go in sorted(self.goItemMapping):
-                item = self.goItemMapping[go]
-                currentGo = knx.GetGroupObject(go)
-                
-                if not currentGo is None:
-                    currentGo.callBack(self.updated)
-                if not item is None:
-                    item.GroupObjects.append(go)
+            groupObjects = []
+            for go, entry in enumerate(self.goTable):
+                if go == 0:
+                    continue
+                currentGo = self.knx.GetGroupObject(go)
+                if currentGo is None:
+                    continue
+
+                groupObjects.append(currentGo)
+                if not entry is None:
+                    entry.groupObject = currentGo
+                    entry.binding.groupObjects.append(currentGo)
+
+            # mirror targets of every GO, the GO a telegram arrives on is not part of its own list
+            for entry in self.goTable:
+                if entry is not None:
+                    entry.fanout = tuple(self.goTable[goNr] for goNr in entry.siblings
+                                         if self.goTable[goNr].groupObject is not None)
+
+            # callbacks only once the tables are complete, they are never changed afterwards
+            for currentGo in groupObjects:
+                currentGo.callBack(self.updated)
+
+            self.startPolling()
         else:
             self.logger.info("knx not configured")
 
-        knx.Start()
+        if self.get_parameter_value('value_cache'):
+            self.loadValueCache()
+
+        if self.dispatcher is not None:
+            self.dispatcher.start()
+        if self.batcher is not None:
+            self.batcher.start()
+
+        if self.get_parameter_value('send_rate') or any(binding.minInterval for binding in self.bindings):
+            self.sendScheduler = SendScheduler(self.writeGo, self.get_parameter_value('send_rate') or 0,
+                                               self.get_parameter_value('send_burst'),
+                                               self.get_parameter_value('send_queue_size'), self.threadName,
+                                               self.droppedGo)
+            self.sendScheduler.start()
+
+        if self.get_parameter_value('record_file'):
+            path = self.get_parameter_value('record_file')
+            if not os.path.isabs(path):
+                path = self.varDir + path
+            self.telegramLog = recorder.Recorder(path)
+            self.logger.info("Recording telegrams to {}".format(path))
+
+        self.knx.Start()
+
+        if self.knx.Configured():
+            self.startInitReads()
+            if self.clock is not None:
+                self.sendClock()
 
         self.alive = True
 
@@ -154,7 +519,26 @@ class KnxEts(SmartPlugin):
         """
         Stop method for the plugin
         """
-        knx.Stop()
+        if self.poller is not None:
+            self.scheduler_remove('poll')
+        if self.initReader is not None:
+            self.initReader.stop()
+        if self.clock is not None:
+            self.scheduler_remove('clock')
+        if self.replayer is not None:
+            self.replayer.stop()
+        self.knx.Stop()
+        if self.telegramLog is not None:
+            self.telegramLog.close()
+        if self.valueCache is not None:
+            self.scheduler_remove('value cache')
+            self.valueCache.close()
+        if self.dispatcher is not None:
+            self.dispatcher.stop()
+        if self.batcher is not None:
+            self.batcher.stop()
+        if self.sendScheduler is not None:
+            self.sendScheduler.stop()
         self.alive = False
 
 
@@ -177,18 +561,57 @@ class KnxEts(SmartPlugin):
         if not self.has_iattr(item.conf, KNX_DPT):
             return None
             
+        if not self.inShard(item):
+            return None
+
         dpt = self.get_iattr_value( item.conf, KNX_DPT)
         if dpt not in dpts.decode:
             self.logger.warning("Ignoring {} unknown dpt: {}".format(item, dpt))
             return None
         
-        item.goCount = 1   
+        goCount = 1
         if self.has_iattr(item.conf, KNX_STATUS):
-            item.goCount += 1
-
-        item.GroupObjects = []
-        self.items.append(item)
-        self.logger.debug("Item {} is mapped to knx_ets({}) with {} groupobjects".format(item, self.get_instance_name(), item.goCount))
+            goCount += 1
+        if self.maxGos and self.goCount + goCount > self.maxGos:
+            self.logger.error("Ignoring {}: instance '{}' already has {} of at most {} GOs, add a shard".format(
+                item, self.get_instance_name(), self.goCount, self.maxGos))
+            # the ComObjects of the item stay in the knxprod with their numbers
+            self.rejectedIdentifiers.update(goIdentifiers(item, goCount))
+            return None
+        self.goCount += goCount
+
+        binding = ItemBinding(item, str(dpt), goCount)
+        if self.decodeTables and binding.dpt in dpts.tableDecode:
+            binding.decoder = dpts.tableDecode[binding.dpt].decode
+        binding.send = bool(self.get_iattr_value(item.conf, KNX_SEND)
+                            or self.get_iattr_value(item.conf, KNX_STATUS))
+        binding.listen = bool(self.get_iattr_value(item.conf, KNX_LISTEN)
+                              or self.get_iattr_value(item.conf, KNX_CACHE)
+                              or self.get_iattr_value(item.conf, KNX_INIT)
+                              or self.get_iattr_value(item.conf, KNX_POLL))
+        binding.reply = bool(self.get_iattr_value(item.conf, KNX_REPLY))
+        binding.init = bool(self.get_iattr_value(item.conf, KNX_CACHE)
+                            or self.get_iattr_value(item.conf, KNX_INIT))
+        binding.cache = bool(self.get_iattr_value(item.conf, KNX_CACHE))
+        if self.has_iattr(item.conf, KNX_MIN_INTERVAL):
+            binding.minInterval = float(self.get_iattr_value(item.conf, KNX_MIN_INTERVAL))
+        binding.onChangeOnly = self.sendOnChangeOnly
+        if self.has_iattr(item.conf, KNX_SEND_ON_CHANGE_ONLY):
+            binding.onChangeOnly = bool(self.get_iattr_value(item.conf, KNX_SEND_ON_CHANGE_ONLY))
+        if self.has_iattr(item.conf, KNX_REFRESH_INTERVAL):
+            binding.refreshInterval = float(self.get_iattr_value(item.conf, KNX_REFRESH_INTERVAL))
+        if self.has_iattr(item.conf, KNX_POLL):
+            poll = self.get_iattr_value(item.conf, KNX_POLL)
+            try:
+                binding.pollInterval = int(poll[1] if isinstance(poll, list) else str(poll).split('|')[1])
+            except (IndexError, ValueError):
+                self.logger.warning("Item {}: ignoring knx_poll {}, expected group address and interval".format(item, poll))
+
+        self.bindingsByItem[item] = binding
+        self.bindings.append(binding)
+        for identifier in binding.identifiers:
+            self.bindingsByText[identifier] = binding
+        self.logger.debug("Item {} is mapped to knx_ets({}) with {} groupobjects".format(item, self.get_instance_name(), goCount))
 
         return self.update_item
 
@@ -212,172 +635,602 @@ class KnxEts(SmartPlugin):
         :param source: if given it represents the source
         :param dest: if given it represents the dest
         """
-        self.logger.debug("item {} updated from {}, source {}, dest {}".format(item, caller, source, dest))	
         if not self.alive:
             return None
 
-        if not self.has_iattr(item.conf, KNX_DPT):
-            return None
-        
         if caller == 'knx_ets':
             return None
 
-        if not knx.Configured():
+        changed = time.perf_counter() if self.stats else 0
+
+        # groupObjects is only filled in run() when the stack is configured
+        binding = self.bindingsByItem[item]
+        if not binding.groupObjects:
+            return None
+
+        # changes within batch_window are sent together
+        if self.batcher is not None:
+            self.batcher.put(binding, changed)
             return None
 
-        dpt = self.get_iattr_value(item.conf, KNX_DPT)
-
-        value = item()
-#        print(value)
-        rawValue = bytes(self.encode(value, dpt))
-#        print(rawValue)
-
-        for goNr in item.GroupObjects:
-            groupObject = knx.GetGroupObject(goNr)
-            groupObject.value = rawValue
-
-    def addComObjects(self, root, ComObjectRefs, ComObjectRefRefs, appId):
-        nextGoNr = len(root) + 1
-        modified = False
-        for item in self.items:
-            for i in range(item.goCount):
-                identifier = str(item.id())
-               
-                if i > 0:
-                    identifier += "_" + str(i)
-
-                commObj = root.find('.//{http://knx.org/xml/project/11}ComObject[@Text="' + identifier + '"]',)
-                if not commObj is None:
+        self.sendBinding(binding, changed)
+
+    def writeItems(self, items):
+        """
+        Send the current values of many items at once, e.g. from a scene logic
+
+        The values are encoded in one pass and handed to the stack or the send scheduler together,
+        switching telegrams first. Items not bound to this instance are ignored.
+
+        :param items: list of items
+        """
+        if not self.alive:
+            return
+        changed = time.perf_counter() if self.stats else 0
+        bindings = (self.bindingsByItem.get(item) for item in items)
+        self.sendBindings([(binding, changed) for binding in bindings
+                           if binding is not None and binding.groupObjects])
+
+    def sendBindings(self, batch):
+        """
+        :param batch: list of (binding, perf_counter of the change)
+        """
+        pending = [] if self.sendScheduler is not None else None
+        for binding, changed in sorted(batch, key=lambda change: change[0].priority):
+            # a value the encoder does not take must not cost the other items of the batch
+            try:
+                self.sendBinding(binding, changed, pending)
+            except Exception as e:
+                self.logger.error("Sending {} failed: {}".format(binding.item, e))
+        if pending:
+            self.sendScheduler.putMany(pending)
+
+    def sendBinding(self, binding, changed, pending=None):
+        """
+        Encode the item value and write it to all GOs of the binding
+
+        :param pending: list collecting the values for the send scheduler, None to queue them one by one
+        """
+        item = binding.item
+        now = time.monotonic() if binding.refreshInterval else 0
+        with binding.lock:
+            # the encode buffer belongs to the binding, so the encoding needs the lock as well
+            if binding.encoderInto is None:
+                rawValue = bytes(binding.encoder(item()))
+            else:
+                binding.encoderInto(item(), binding.buffer)
+                rawValue = bytes(binding.buffer)
+            # received telegrams lack the leading byte of the encoders, lastRaw holds the payload of both directions
+            payload = rawValue[binding.payloadStart:]
+
+            for entry in binding.entries:
+                if entry.groupObject is None:
                     continue
 
-                modified = True
-                dpt = self.get_iattr_value(item.conf, KNX_DPT)
-                size = dpts.sizes[str(dpt)]
-                newElement = ET.Element("ComObject")
-                itemName = str(item)
-                newElement.set("Name", (itemName[:45] + '..') if len(itemName) > 50 else itemName)
-                newElement.set("Number", str(nextGoNr))
-                newElement.set("Text", identifier)
-                newElement.set("FunctionText", itemName + str(i))
-                newElement.set("ObjectSize", dpts.sizenames[str(dpt)])
-                newElement.set("DatapointType", "")
-                Id=appId + "_O-" + str(nextGoNr)
-                newElement.set("Id", Id)
-                
-                newComObjectRef = ET.Element("ComObjectRef")
-                newComObjectRef.set("Id", Id + "_R-" + str(nextGoNr))
-                newComObjectRef.set("RefId", Id)
-                
-                newComObjectRefRef= ET.Element("ComObjectRefRef") 
-                newComObjectRefRef.set("RefId", Id + "_R-" + str(nextGoNr))
-                
-
-                if self.get_iattr_value(item.conf, KNX_REPLY):
-                    newElement.set("ReadFlag", "Enabled")
+                if binding.onChangeOnly:
+                    if (entry.lastRaw == payload and not entry.sendDropped
+                            and (not binding.refreshInterval or now - entry.lastSendTime < binding.refreshInterval)):
+                        binding.cacheHits += 1
+                        continue
+                    binding.cacheMisses += 1
+
+                entry.lastRaw = payload
+                # cleared before the value is queued, the send scheduler sets it again if it drops the value
+                entry.sendDropped = False
+                entry.lastSendTime = now
+                entry.changedAt = changed
+                if entry.traced:
+                    self.tracer.add(entry.goNr, TX, rawValue, item())
+                if self.sendScheduler is None:
+                    self.setGo(entry, rawValue)
+                elif pending is None:
+                    self.sendScheduler.put(entry, rawValue, binding.priority, binding.minInterval)
                 else:
-                    newElement.set("ReadFlag", "Disabled")
-
-                if (self.get_iattr_value(item.conf, KNX_LISTEN) 
-                    or self.get_iattr_value(item.conf, KNX_CACHE) 
-                    or self.get_iattr_value(item.conf, KNX_INIT) 
-                    or self.get_iattr_value(item.conf, KNX_POLL)):
-                    newElement.set("WriteFlag", "Enabled")
-                    newElement.set("UpdateFlag", "Enabled")
-                else:
-                    newElement.set("WriteFlag", "Disabled")
-                    newElement.set("UpdateFlag", "Disabled")
+                    pending.append((entry, rawValue, binding.priority, binding.minInterval))
 
-                newElement.set("CommunicationFlag", "Enabled")
+            # in the form of a received value, the cache holds the last value of the item whichever way it went
+            if self.valueCache is not None and binding.cache:
+                self.valueCache.put(binding.mainGoNr, payload)
 
-                if (self.get_iattr_value(item.conf, KNX_SEND)
-                    or self.get_iattr_value(item.conf, KNX_STATUS)):
-                    newElement.set("TransmitFlag", "Enabled")
-                else:
-                    newElement.set("TransmitFlag", "Disabled")
+    def startPolling(self):
+        """
+        Register the main GO of every item with knx_poll at the poll scheduler, driven by a 1 second cycle
+        """
+        polled = [binding for binding in self.bindings if binding.pollInterval]
+        if not polled:
+            return
+
+        self.poller = PollScheduler(self.readGo, self.get_parameter_value('poll_rate') or 0, name=self.threadName)
+        for binding in polled:
+            entry = self.mainEntry(binding)
+            if entry is not None and entry.groupObject is not None:
+                self.poller.add(entry, str(binding.item), binding.pollInterval)
+        self.scheduler_add('poll', self.poller.tick, cycle=1)
+
+    def mainEntry(self, binding):
+        return self.goTable[binding.mainGoNr] if binding.mainGoNr else None
 
-                if (self.get_iattr_value(item.conf, KNX_CACHE) 
-                    or self.get_iattr_value(item.conf, KNX_INIT)):
-                    newElement.set("ReadOnInitFlag", "Enabled")
+    def startInitReads(self):
+        """
+        Read the main GO of all items with knx_cache or knx_init, if init_reads is 'plugin'
+        """
+        if self.initReads != 'plugin':
+            return
+
+        self.initReader = InitReader(self.readGo, self.get_parameter_value('init_read_rate'),
+                                     self.get_parameter_value('init_read_window'),
+                                     self.get_parameter_value('init_read_timeout'), self.threadName)
+        for binding in self.bindings:
+            entry = self.mainEntry(binding)
+            if not binding.init or entry is None or entry.groupObject is None:
+                continue
+            if entry.lastRaw is not None:
+                # already known from the value cache
+                continue
+            item = binding.item
+            if self.has_iattr(item.conf, KNX_INIT_PRIORITY):
+                priority = int(self.get_iattr_value(item.conf, KNX_INIT_PRIORITY))
+            else:
+                # logics are loaded by now, items they depend on come first
+                getTriggers = getattr(item, 'get_logic_triggers', None)
+                priority = 1 if getTriggers is not None and getTriggers() else 0
+            self.initReader.add(entry, priority)
+        self.initReader.start()
+
+    def loadValueCache(self):
+        """
+        Set knx_cache items and their GOs to the values cached by the last run, before the stack starts
+        """
+        widths = {}
+        for binding in self.bindings:
+            if binding.cache and binding.mainGoNr:
+                widths[binding.mainGoNr] = dpts.sizes[binding.dpt] + 1
+        self.valueCache = ValueCache(self.valueCachePath, widths)
+        try:
+            values = self.valueCache.open()
+        except (OSError, ValueError) as e:
+            self.logger.error("Value cache {} not usable: {}".format(self.valueCachePath, e))
+            self.valueCache = None
+            return
+
+        for goNr, rawValue in values.items():
+            binding = self.goTable[goNr].binding
+            try:
+                value = binding.decoder(rawValue)
+            except Exception as e:
+                self.logger.warning("Ignoring cached value of {}: {}".format(binding.item, e))
+                continue
+            for entry in binding.entries:
+                entry.lastRaw = rawValue
+                if entry.groupObject is not None:
+                    entry.groupObject.value = rawValue
+            binding.item(value, "knx_ets")
+        self.logger.info("{} of {} cached values loaded".format(len(values), len(widths)))
+
+        self.scheduler_add('value cache', self.valueCache.flush, cycle=self.get_parameter_value('value_cache_flush'))
+
+    def addClockBindings(self):
+        """
+        Add a send only GO for each of time_ga, date_ga and datetime_ga that is set
+        """
+        self.clock = ClockSender(self.writeClock, self.get_parameter_value('send_time'), self.threadName)
+        for name, dpt, parameter in CLOCK_GOS:
+            if not self.get_parameter_value(parameter):
+                continue
+            binding = ItemBinding(ClockObject(name), dpt, 1)
+            binding.send = True
+            self.goCount += 1
+            self.bindings.append(binding)
+            self.bindingsByText[binding.identifiers[0]] = binding
+            self.clock.add(dpt, binding)
+        if not self.clock.bindings:
+            self.clock = None
+
+    def sendClock(self):
+        nextTime = self.clock.send()
+        # rescheduled for every boundary, a cycle would drift away from the wall clock
+        self.scheduler_add('clock', self.sendClock, next=nextTime)
+
+    def writeClock(self, binding, rawValue):
+        with binding.lock:
+            for entry in binding.entries:
+                if entry.groupObject is None:
+                    continue
+                entry.lastRaw = rawValue[binding.payloadStart:]
+                # ahead of queued control traffic, but still within send_rate
+                if self.sendScheduler is None:
+                    self.setGo(entry, rawValue)
                 else:
-                    newElement.set("ReadOnInitFlag", "Disabled")
+                    self.sendScheduler.put(entry, rawValue, PRIORITY_HIGH)
 
-                root.append(newElement) 
-                ComObjectRefs.append(newComObjectRef)
-                ComObjectRefRefs.append(newComObjectRefRef)
-                
-                nextGoNr += 1
-        
-        return modified
-
-    def indent(self, elem, level=0):
-        i = "\n" + level*"  "
-        if len(elem):
-            if not elem.text or not elem.text.strip():
-                elem.text = i + "  "
-            if not elem.tail or not elem.tail.strip():
-                elem.tail = i
-            for elem in elem:
-                self.indent(elem, level+1)
-            if not elem.tail or not elem.tail.strip():
-                elem.tail = i
-        else:
-            if level and (not elem.tail or not elem.tail.strip()):
-                elem.tail = i
+    def droppedGo(self, entry, rawValue):
+        """
+        A value was dropped by the send scheduler. Called with the lock of the send scheduler held, which is taken
+        within the lock of the binding, so only the flag is set and lastRaw is left alone
+        """
+        entry.sendDropped = True
 
-    def generateKnxProd(self):
-        sourcePath = self.sh.base_dir + '/plugins/knx_ets/assets/smarthomeNG.xml'
+    def readGo(self, entry):
+        """
+        Send a read request for a GO, called by the poll scheduler
+        """
+        entry.groupObject.requestObjectRead()
 
-        if os.path.isfile(self.knxprodPath):
-            sourcePath = self.knxprodPath
+    def writeGo(self, entry, rawValue):
+        """
+        Write a value to a GO, called by the send scheduler
+        """
+        with entry.binding.lock:
+            # a telegram received while the value was queued is newer, sending the value would undo it
+            if entry.lastRaw != rawValue[entry.binding.payloadStart:]:
+                return
+            self.setGo(entry, rawValue)
 
-        tree = ET.parse(sourcePath)
-        root = tree.getroot()
+    def setGo(self, entry, rawValue):
+        """
+        Write a value to a GO, the caller holds the lock of the binding
+        """
+        entry.groupObject.value = rawValue
+        if self.telegramLog is not None:
+            self.telegramLog.record(entry.goNr, recorder.TX, rawValue)
+        if self.stats:
+            entry.tx += 1
+            entry.txBytes += len(rawValue)
+            if entry.changedAt:
+                self.sendLatency.add(time.perf_counter() - entry.changedAt)
+                entry.changedAt = 0
+
+    def setTrace(self, selection):
+        """
+        Select the GOs to trace
 
-        appProg = root.find(".//{http://knx.org/xml/project/11}ApplicationProgram")
-        
-        version = int(appProg.get("ApplicationVersion"))
-        
-        //Rename all references with the old AppId
-        appId = appProg.get("Id")
-        appReplaceOld = appId[9:]
-        appId = appId.Replace("-" + ("%02X" % version) + "-", "-" + ("%02X" % (version+1)) + "-");
-        appProg.set("Id", appId)
-        appReplaceNew = appId[9:]
-        tempObj = root.find(".//{http://knx.org/xml/project/11}CatalogItem")
-        tempObj.set("Id", tempObj.get("Id").replace(appReplaceOld, appReplaceNew))
-        tempObj.set("Hardware2ProgramRefId", tempObj.get("Hardware2ProgramRefId").replace(appReplaceOld, appReplaceNew))        
-        tempObj = root.find(".//{http://knx.org/xml/project/11}Hardware2Program")
-        tempObj.set("Id", tempObj.get("Id").replace(appReplaceOld, appReplaceNew))  
-        tempObj = root.find(".//{http://knx.org/xml/project/11}ApplicationProgramRef")
-        tempObj.set("RefId", tempObj.get("RefId").replace(appReplaceOld, appReplaceNew))
-        tempObj = root.find(".//{http://knx.org/xml/project/11}RelativeSegment")
-        tempObj.set("Id", tempObj.get("Id").replace(appReplaceOld, appReplaceNew))
-
-        comObjs = root.find(".//{http://knx.org/xml/project/11}ComObjectTable")
-        ComObjectRefs = root.find(".//{http://knx.org/xml/project/11}ComObjectRefs")
-        ComObjectRefRefs = root.find(".//{http://knx.org/xml/project/11}ChannelIndependentBlock")
-        
-        modified = self.addComObjects(comObjs, ComObjectRefs, ComObjectRefRefs, appId)
+        :param selection: list of GO numbers and item paths, '*' traces all GOs
+        """
+        self.traceSelection = selection
+        selected = set(selection)
+        for entry in self.goTable:
+            if entry is not None:
+                entry.traced = ('*' in selected or str(entry.goNr) in selected
+                                or str(entry.binding.item) in selected)
+
+    def startReplay(self, path, speed=1):
+        """
+        Feed the received telegrams of a telegram log into the simulated stack
+
+        :param speed: factor on the recorded pace, 0 replays as fast as possible
+        """
+        if not isinstance(self.knx, knxsim.Stack):
+            self.logger.error("Replays need stack: simulated")
+            return
+        if not self.alive:
+            return
+        if self.replayer is not None:
+            self.replayer.stop()
+        if not os.path.isabs(path):
+            path = self.varDir + path
+        self.replayer = Replayer(self.knx.receive, path, speed, self.threadName)
+        self.replayer.start()
+
+    def metrics(self):
+        """
+        Telegram counters per GO and the latency histograms, shown in the web interface and served as JSON
+        """
+        gos = []
+        for entry in self.goTable:
+            if entry is None:
+                continue
+            with entry.binding.lock:
+                gos.append(self.goMetrics(entry))
+        return {
+            'enabled': bool(self.stats),
+            'gos': gos,
+            'latency': {
+                'receive': self.receiveLatency.toDict(),
+                'send': self.sendLatency.toDict(),
+            },
+        }
+
+    def goMetrics(self, entry):
+        return {
+            'go': entry.goNr,
+            'item': str(entry.binding.item),
+            'dpt': entry.binding.dpt,
+            'rx': entry.rx,
+            'tx': entry.tx,
+            'rx_bytes': entry.rxBytes,
+            'tx_bytes': entry.txBytes,
+            'decode_errors': entry.decodeErrors,
+            'last_seen': None if entry.lastSeen is None else
+                time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry.lastSeen)),
+        }
+
+    def statistics(self):
+        """
+        Counters of the plugin by section, shown in the web interface
+        """
+        result = {
+            'send cache': {
+                'hits': sum(binding.cacheHits for binding in self.bindings),
+                'misses': sum(binding.cacheMisses for binding in self.bindings),
+            },
+        }
+        if self.dispatcher is not None:
+            result['dispatch'] = self.dispatcher.statistics()
+        if self.batcher is not None:
+            result['batch'] = self.batcher.statistics()
+        if self.sendScheduler is not None:
+            result['send'] = self.sendScheduler.statistics()
+        if self.poller is not None:
+            result['poll'] = self.poller.statistics()
+        if self.initReader is not None:
+            result['initial reads'] = self.initReader.statistics()
+        if self.valueCache is not None:
+            result['value cache'] = self.valueCache.statistics()
+        if self.clock is not None:
+            result['clock'] = self.clock.statistics()
+        if self.telegramLog is not None:
+            result['recorder'] = {'file': self.telegramLog.path, 'telegrams': self.telegramLog.records}
+        if self.replayer is not None:
+            result['replay'] = self.replayer.statistics()
+        if isinstance(self.knx, ProcessStack):
+            result['stack process'] = self.knx.statistics()
+        return result
+
+    def allocateComObjects(self, appId, properties):
+        """
+        Update goTexts to the identifiers of the bindings
+
+        Identifiers that already have a ComObject keep their GO number. The numbers of identifiers no longer
+        bound are freed, new identifiers take the lowest free number and only then numbers above the highest
+        one in use, so a configuration change touches as few GOs as possible. Items ignored because of max_gos
+        keep their numbers. Kept ComObjects whose size or flags no longer match their item are changed.
+
+        :param properties: dict GO number -> values of knxprod.COM_OBJECT_PROPERTIES of the existing ComObjects
+        :return: (list of (goNr, binding, index of the GO within the binding) for the new ComObjects,
+                  dict GO number -> text of the removed ComObjects,
+                  dict GO number -> attributes to change of the kept ComObjects)
+        """
+        bound = set(self.rejectedIdentifiers)
+        for binding in self.bindings:
+            bound.update(binding.identifiers)
+        removed = {goNr: text for goNr, text in self.goTexts.items() if text not in bound}
+        for goNr in removed:
+            del self.goTexts[goNr]
+
+        changed = {}
+        for goNr, identifier in self.goTexts.items():
+            binding = self.bindingsByText.get(identifier)
+            if binding is None or goNr not in properties:
+                continue
+            attributes = self.comObjectAttributes(appId, goNr, binding, binding.identifiers.index(identifier))
+            difference = dict((key, attributes[key])
+                              for key, value in zip(knxprod.COM_OBJECT_PROPERTIES, properties[goNr])
+                              if value != attributes[key])
+            if difference:
+                changed[goNr] = difference
+
+        nextGoNr = max(self.goTexts, default=0) + 1
+        free = sorted(set(range(1, nextGoNr)) - set(self.goTexts), reverse=True)
+        existing = set(self.goTexts.values())
+        newComObjects = []
+        for binding in self.bindings:
+            for i, identifier in enumerate(binding.identifiers):
+                if identifier in existing:
+                    continue
+
+                if free:
+                    goNr = free.pop()
+                else:
+                    goNr = nextGoNr
+                    nextGoNr += 1
+                newComObjects.append((goNr, binding, i))
+                self.goTexts[goNr] = identifier
+
+        return newComObjects, removed, changed
+
+    def comObjectAttributes(self, appId, goNr, binding, i):
+        itemName = str(binding.item)
+        return {
+            "Name": (itemName[:45] + '..') if len(itemName) > 50 else itemName,
+            "Number": str(goNr),
+            "Text": binding.identifiers[i],
+            "FunctionText": itemName + str(i),
+            "ObjectSize": dpts.sizenames[binding.dpt],
+            "DatapointType": "",
+            "Id": appId + "_O-" + str(goNr),
+            "ReadFlag": "Enabled" if binding.reply else "Disabled",
+            "WriteFlag": "Enabled" if binding.listen else "Disabled",
+            "UpdateFlag": "Enabled" if binding.listen else "Disabled",
+            "CommunicationFlag": "Enabled",
+            "TransmitFlag": "Enabled" if binding.send else "Disabled",
+            "ReadOnInitFlag": "Enabled" if binding.init and self.initReads != 'plugin' else "Disabled",
+        }
 
-        if not modified:
+    def knxProdFingerprint(self):
+        """
+        Hash over the template and everything of the items that ends up in the knxprod
+        """
+        fingerprint = hashlib.sha1()
+        with open(self.templatePath, 'rb') as template:
+            fingerprint.update(template.read())
+        fingerprint.update("init_reads={}\n".format(self.initReads).encode())
+        for binding in self.bindings:
+            fingerprint.update("{}|{}|{}|{}{}{}{}\n".format(binding.item, ",".join(binding.identifiers), binding.dpt,
+                                                          int(binding.send), int(binding.listen),
+                                                          int(binding.reply), int(binding.init)).encode())
+        for identifier in sorted(self.rejectedIdentifiers):
+            fingerprint.update("rejected {}\n".format(identifier).encode())
+        return fingerprint.hexdigest()
+
+    def knxProdStamp(self, fingerprint):
+        # the stamp also covers the knxprod file itself, so replacing or touching it forces a regeneration
+        stat = os.stat(self.knxprodPath)
+        return "{}\n{} {}\n".format(fingerprint, stat.st_size, stat.st_mtime_ns)
+
+    def knxProdUpToDate(self, fingerprint):
+        if (not os.path.isfile(self.knxprodPath) or not os.path.isfile(self.fingerprintPath)
+                or not os.path.isfile(self.goMapPath)):
+            return False
+        with open(self.fingerprintPath) as stampFile:
+            return stampFile.read() == self.knxProdStamp(fingerprint)
+
+    def generateKnxProd(self):
+        fingerprint = self.knxProdFingerprint()
+        if self.knxProdUpToDate(fingerprint):
+            self.logger.debug("knxprod {} is up to date".format(self.knxprodPath))
+            self.loadGoMap()
+            self.loadGoChanges()
             return
 
-        appProg.set("ApplicationVersion", str(version + 1))
-        appProg.set("ReplacesVersions", str(version))
+        sourcePath = self.templatePath
 
-        self.indent(root)
-        tree.write(self.knxprodPath, encoding="utf-8", xml_declaration=True)
+        if os.path.isfile(self.knxprodPath):
+            sourcePath = self.knxprodPath
+
+        info = knxprod.scan(sourcePath)
+        self.goTexts = info.goTexts
+        version = info.version
+        highestGoNr = max(self.goTexts, default=0)
+
+        appId = info.appId.replace("-" + ("%02X" % version) + "-", "-" + ("%02X" % (version+1)) + "-")
+
+        newComObjects, removed, changed = self.allocateComObjects(appId, info.properties)
+        if newComObjects or removed or changed:
+            # the ComObject attributes are built while writing, one element at a time
+            knxprod.write(sourcePath, self.knxprodPath, info.appId, appId, version,
+                          lambda: (self.comObjectAttributes(appId, *entry) for entry in newComObjects),
+                          removed, changed)
+            # numbers reused by earlier versions stay reused until the device is downloaded
+            reused = {}
+            if self.awaitingDownload():
+                self.loadGoChanges()
+                reused = dict((goNr, text) for goNr, text in self.goChanges['reused']
+                              if self.goTexts.get(goNr) == text)
+            reused.update((goNr, self.goTexts[goNr]) for goNr, binding, i in newComObjects if goNr <= highestGoNr)
+            self.goChanges = {
+                'version': version + 1,
+                'added': sorted((goNr, self.goTexts[goNr]) for goNr, binding, i in newComObjects),
+                'removed': sorted(removed.items()),
+                'changed': sorted((goNr, self.goTexts[goNr]) for goNr in changed),
+                'reused': sorted(reused.items()),
+            }
+            self.logGoChanges()
+            self.saveGoChanges()
+            cleared = [goNr for goNr, attributes in changed.items() if attributes.get('ReadOnInitFlag') == 'Disabled']
+            if cleared:
+                self.logger.warning("ReadOnInit was cleared on GOs {}, the device reads them at its start as well until "
+                                    "the new knxprod is downloaded with ETS".format(goRanges(cleared)))
+            reused = set(goNr for goNr, binding, i in newComObjects) & set(removed)
+            if reused and os.path.isfile(self.valueCachePath):
+                # the layout of the cache does not tell a reused GO number from the old one
+                self.logger.info("GO numbers {} were reused, discarding the value cache".format(goRanges(reused)))
+                os.remove(self.valueCachePath)
+        else:
+            # the knxprod is unchanged, so are the changes of its version
+            self.loadGoChanges()
+
+        if os.path.isfile(self.knxprodPath):
+            self.saveGoMap()
+            with open(self.fingerprintPath, 'w') as stampFile:
+                stampFile.write(self.knxProdStamp(fingerprint))
 
    #     if os.path.exists(self.flashFilePath):
    #         os.remove(self.flashFilePath)
 
-    def buildGoItemMapping(self):
-        tree = ET.parse(self.knxprodPath)
-        root = tree.getroot()
-        for element in root.findall(".//{http://knx.org/xml/project/11}ComObject"):
-            goNr = int(element.get('Number'))
-            item = self.sh.return_item(element.get('Text'))
-            self.goItemMapping[goNr] = item
+    def saveGoMap(self):
+        """
+        Persist the GO number to ComObject text mapping of the knxprod, one 'number<TAB>text' line per GO
+        """
+        tmpPath = self.goMapPath + '.tmp'
+        with open(tmpPath, 'w', encoding='utf-8') as goMap:
+            for goNr in sorted(self.goTexts):
+                goMap.write("{}\t{}\n".format(goNr, self.goTexts[goNr]))
+        os.replace(tmpPath, self.goMapPath)
+
+    def loadGoMap(self):
+        self.goTexts = {}
+        with open(self.goMapPath, encoding='utf-8') as goMap:
+            for line in goMap:
+                goNr, text = line.rstrip('\n').split('\t', 1)
+                self.goTexts[int(goNr)] = text
+
+    def logGoChanges(self):
+        added = [goNr for goNr, text in self.goChanges['added']]
+        removed = [goNr for goNr, text in self.goChanges['removed']]
+        changed = [goNr for goNr, text in self.goChanges['changed']]
+        self.logger.info("knxprod version {}: {} GOs added, {} removed, {} changed, {} unchanged".format(
+            self.goChanges['version'], len(added), len(removed), len(changed),
+            len(self.goTexts) - len(added) - len(changed)))
+        for key, title in (('added', "Added"), ('removed', "Removed"), ('changed', "Changed")):
+            if self.goChanges[key]:
+                self.logger.info("{} GOs: {}".format(title, goRanges(goNr for goNr, text in self.goChanges[key])))
+            for goNr, text in self.goChanges[key]:
+                self.logger.debug("GO {} {}: {}".format(goNr, key, text))
+
+    def saveGoChanges(self):
+        """
+        Persist the changes of the last knxprod version, one '+|-|*|!<TAB>number<TAB>text' line per added, removed,
+        changed or reused GO after a version line
+        """
+        tmpPath = self.goChangesPath + '.tmp'
+        with open(tmpPath, 'w', encoding='utf-8') as goChanges:
+            goChanges.write("version\t{}\n".format(self.goChanges['version']))
+            for sign, key in GO_CHANGE_SIGNS:
+                for goNr, text in self.goChanges[key]:
+                    goChanges.write("{}\t{}\t{}\n".format(sign, goNr, text))
+        os.replace(tmpPath, self.goChangesPath)
+
+    def loadGoChanges(self):
+        self.goChanges = {'version': None, 'added': [], 'removed': [], 'changed': [], 'reused': []}
+        if not os.path.isfile(self.goChangesPath):
+            return
+        keys = dict(GO_CHANGE_SIGNS)
+        with open(self.goChangesPath, encoding='utf-8') as goChanges:
+            for line in goChanges:
+                fields = line.rstrip('\n').split('\t', 2)
+                if fields[0] == 'version':
+                    self.goChanges['version'] = int(fields[1])
+                else:
+                    self.goChanges[keys[fields[0]]].append((int(fields[1]), fields[2]))
+
+    def awaitingDownload(self):
+        """
+        Whether the device was not downloaded with ETS since the last knxprod version: the stack writes the flash
+        file on a download, saveGoChanges the changes file on a new version. Without a flash file the device
+        has no group addresses at all.
+        """
+        return (os.path.isfile(self.flashFilePath) and os.path.isfile(self.goChangesPath)
+                and os.path.getmtime(self.flashFilePath) <= os.path.getmtime(self.goChangesPath))
+
+    def buildGoTable(self):
+        """
+        Build the GO table from goTexts, which comes from the generation pass or the gomap file.
+        A list indexed by GO number is used; index 0 and the numbers freed by removed items stay empty.
+        Reused numbers stay empty as well until the device is downloaded with ETS, until then its association
+        table still links them to the group addresses of the removed items.
+        """
+        self.unboundGos = set()
+        if self.goChanges['reused'] and self.awaitingDownload():
+            self.unboundGos = set(goNr for goNr, text in self.goChanges['reused'])
+            self.logger.warning("GOs {} were given to new items, they stay unbound until the knxprod is downloaded "
+                                "with ETS: the device still links them to the group addresses of the removed "
+                                "items".format(goRanges(self.unboundGos)))
+        goTable = [None] * (max(self.goTexts) + 1)
+        for goNr in sorted(self.goTexts):
+            binding = self.bindingsByText.get(self.goTexts[goNr])
+            if binding is None or goNr in self.unboundGos:
+                continue
+            entry = GoEntry(goNr, binding)
+            binding.entries.append(entry)
+            if self.goTexts[goNr] == binding.identifiers[0]:
+                binding.mainGoNr = goNr
+            goTable[goNr] = entry
+
+        for index, binding in enumerate(self.bindings):
+            binding.lock = self.locks[index % LOCK_STRIPES]
+            for entry in binding.entries:
+                entry.siblings = tuple(other.goNr for other in binding.entries if other is not entry)
+        self.goTable = goTable
 
     def init_webinterface(self):
         """"
@@ -440,14 +1293,31 @@ class WebInterface(SmartPluginWebIf):
 
 
     @cherrypy.expose
-    def index(self, reload=None, toggleProgramMode = False, getKnxProd = False, deleteConfig = False):
+    @cherrypy.tools.json_out()
+    def metrics(self):
+        """
+        Telegram counters per GO and latency histograms as JSON
+        """
+        return self.plugin.metrics()
+
+    @cherrypy.expose
+    @cherrypy.tools.json_out()
+    def traceDump(self):
+        """
+        Trace records of the selected GOs as JSON, newest first
+        """
+        return self.plugin.tracer.dump()
+
+    @cherrypy.expose
+    def index(self, reload=None, toggleProgramMode = False, getKnxProd = False, deleteConfig = False,
+              trace=None, clearTrace=False, replay=None, replaySpeed=1):
         """
         Build index.html for cherrypy
         Render the template and return the html file to be delivered to the browser
         :return: contents of the template after beeing rendered
         """
         if toggleProgramMode:
-            knx.ProgramMode(not knx.ProgramMode())
+            self.plugin.knx.ProgramMode(not self.plugin.knx.ProgramMode())
 
         if getKnxProd:
             #if not os.path.isfile(self.plugin.knxprodPath):
@@ -459,6 +1329,19 @@ class WebInterface(SmartPluginWebIf):
             if os.path.exists(self.plugin.flashFilePath):
                 os.remove(self.plugin.flashFilePath)
 
+        if trace is not None:
+            self.plugin.setTrace([selected.strip() for selected in trace.split(',') if selected.strip()])
+
+        if clearTrace:
+            self.plugin.tracer.clear()
+
+        if replay:
+            try:
+                speed = float(replaySpeed)
+            except ValueError:
+                speed = 1
+            self.plugin.startReplay(replay, speed)
+
         tmpl = self.tplenv.get_template('index.html')
         return tmpl.render(plugin_shortname=self.plugin.get_shortname(), plugin_version=self.plugin.get_version(),
                            plugin_info=self.plugin.get_info(), p=self.plugin)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG.
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG.  If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+import logging
+import threading
+import time
+
+
+class Batcher:
+    """
+    Collects changes for window seconds after the first one and hands them
+    to handler as one list of (key, value).
+
+    A key changed again within the window is handed over once, with the
+    value of its first change.
+    """
+
+    def __init__(self, handler, window, name='knx_ets'):
+        self.logger = logging.getLogger(__name__)
+        self.handler = handler
+        self.window = window
+        self.name = name
+        self.condition = threading.Condition()
+        self.pending = {}
+        self.thread = None
+        self.running = False
+
+        self.batches = 0
+        self.changes = 0
+        self.coalesced = 0
+        self.largest = 0
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.work, name=self.name + ".batch", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join(5)
+            self.thread = None
+
+    def put(self, key, value):
+        with self.condition:
+            if key in self.pending:
+                self.coalesced += 1
+                return
+            self.pending[key] = value
+            self.changes += 1
+            if len(self.pending) == 1:
+                self.condition.notify()
+
+    def work(self):
+        while True:
+            with self.condition:
+                while self.running and not self.pending:
+                    self.condition.wait()
+                if not self.running:
+                    return
+            # the window starts with the first change of the batch
+            time.sleep(self.window)
+            with self.condition:
+                batch = list(self.pending.items())
+                self.pending = {}
+                self.batches += 1
+                self.largest = max(self.largest, len(batch))
+
+            try:
+                self.handler(batch)
+            except Exception as e:
+                self.logger.exception("{}: sending a batch of {} failed: {}".format(self.name, len(batch), e))
+
+    def statistics(self):
+        with self.condition:
+            return {
+                'window ms': round(self.window * 1000),
+                'batches': self.batches,
+                'changes': self.changes,
+                'coalesced': self.coalesced,
+                'largest': self.largest,
+            }
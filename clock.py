@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG.
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG.  If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+import datetime
+import logging
+
+from . import dpts
+
+# name, dpt and plugin parameter of the clock GOs
+CLOCK_GOS = (
+    ('time', '10', 'time_ga'),
+    ('date', '11', 'date_ga'),
+    ('datetime', '19', 'datetime_ga'),
+)
+
+
+class ClockObject:
+    """
+    Stands in for the item in the binding of a clock GO
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def id(self):
+        return 'knx_ets.' + self.name
+
+    def __str__(self):
+        return self.id()
+
+    def __call__(self, value=None, caller=None, *args):
+        # clock GOs are send only, received values are ignored
+        return None
+
+
+class ClockSender:
+    """
+    Sends time, date and date-time at every multiple of interval seconds
+    since local midnight.
+
+    The payloads for the next boundary are encoded right after a send, so
+    at the boundary itself only the precomputed telegrams are handed to the
+    writer, unless the UTC offset changed in between. The date payload is
+    reused until the day changes.
+    """
+
+    def __init__(self, writer, interval, name='knx_ets'):
+        self.logger = logging.getLogger(__name__)
+        self.writer = writer
+        self.interval = interval
+        self.name = name
+        # dpt -> binding
+        self.bindings = {}
+        self.nextTime = None
+        self.payloads = ()
+        self.date = None
+        self.datePayload = None
+
+        self.sends = 0
+        self.late = 0
+
+    def add(self, dpt, binding):
+        self.bindings[dpt] = binding
+
+    def nextBoundary(self, now):
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        elapsed = (now - midnight).total_seconds()
+        return midnight + datetime.timedelta(seconds=(int(elapsed // self.interval) + 1) * self.interval)
+
+    def encode(self, when):
+        payloads = []
+        for dpt, binding in self.bindings.items():
+            if dpt == '11':
+                if self.date != when.date():
+                    self.date = when.date()
+                    self.datePayload = bytes(dpts.encode['11'](when))
+                payloads.append((binding, self.datePayload))
+            else:
+                payloads.append((binding, bytes(dpts.encode[dpt](when))))
+        return tuple(payloads)
+
+    def send(self, now=None):
+        """
+        Send the payloads of the current boundary and prepare the next one
+
+        :return: time of the next boundary
+        """
+        if now is None:
+            now = datetime.datetime.now().astimezone()
+        payloads = self.payloads
+        if self.nextTime is None or abs((now - self.nextTime).total_seconds()) >= 1:
+            # first send or the scheduler was late, the precomputed time would be wrong
+            if self.nextTime is not None:
+                self.late += 1
+            payloads = self.encode(now.replace(microsecond=0))
+        elif now.utcoffset() != self.nextTime.utcoffset():
+            # daylight saving time began or ended, the precomputed wall clock time is an hour off
+            payloads = self.encode(now.replace(microsecond=0))
+
+        for binding, rawValue in payloads:
+            try:
+                self.writer(binding, rawValue)
+            except Exception as e:
+                self.logger.error("{}: sending {} failed: {}".format(self.name, binding.item, e))
+        self.sends += 1
+
+        self.nextTime = self.nextBoundary(now)
+        self.payloads = self.encode(self.nextTime)
+        return self.nextTime
+
+    def statistics(self):
+        return {
+            'interval': self.interval,
+            'gos': ", ".join(str(binding.item) for binding in self.bindings.values()),
+            'sends': self.sends,
+            'late': self.late,
+            'next': None if self.nextTime is None else self.nextTime.strftime('%H:%M:%S'),
+        }
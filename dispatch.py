@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG.
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG.  If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+import logging
+import threading
+
+DROP_OLDEST = 'oldest'
+DROP_NEWEST = 'newest'
+
+
+class Dispatcher:
+    """
+    Bounded hand-off of received GO values from the stack callback to a pool
+    of worker threads.
+
+    At most one value per GO is pending, a newer value replaces the pending
+    one (last value wins). A GO is never processed by two workers at the same
+    time, so the values of one GO reach the handler in order. If maxPending
+    GOs are pending, a value for another GO either replaces the oldest
+    pending GO (DROP_OLDEST) or is discarded (DROP_NEWEST).
+    """
+
+    def __init__(self, handler, workers=1, maxPending=1000, dropPolicy=DROP_OLDEST, name='knx_ets'):
+        self.logger = logging.getLogger(__name__)
+        self.handler = handler
+        self.workerCount = max(1, workers)
+        self.maxPending = max(1, maxPending)
+        self.dropPolicy = dropPolicy
+        self.name = name
+        self.condition = threading.Condition()
+        self.pending = {}
+        self.active = set()
+        self.threads = []
+        self.running = False
+
+        self.queued = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.processed = 0
+        self.errors = 0
+
+    def start(self):
+        self.running = True
+        for i in range(self.workerCount):
+            thread = threading.Thread(target=self.work, name="{}.dispatch{}".format(self.name, i), daemon=True)
+            self.threads.append(thread)
+            thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        for thread in self.threads:
+            thread.join(5)
+        self.threads = []
+
+    def put(self, key, value):
+        """
+        Queue value for key, called from the stack thread
+        """
+        with self.condition:
+            if key in self.pending:
+                self.pending[key] = value
+                self.coalesced += 1
+                return
+
+            if len(self.pending) >= self.maxPending:
+                self.dropped += 1
+                if self.dropPolicy == DROP_NEWEST:
+                    return
+                del self.pending[next(iter(self.pending))]
+
+            self.pending[key] = value
+            self.queued += 1
+            self.condition.notify()
+
+    def nextKey(self):
+        # oldest pending key that no other worker is processing
+        for key in self.pending:
+            if key not in self.active:
+                return key
+        return None
+
+    def work(self):
+        while True:
+            with self.condition:
+                key = self.nextKey()
+                while self.running and key is None:
+                    self.condition.wait()
+                    key = self.nextKey()
+                if not self.running:
+                    return
+                value = self.pending.pop(key)
+                self.active.add(key)
+
+            try:
+                self.handler(key, value)
+            except Exception as e:
+                self.errors += 1
+                self.logger.exception("{}: handling {} failed: {}".format(self.name, key, e))
+            finally:
+                with self.condition:
+                    self.active.discard(key)
+                    self.processed += 1
+                    if key in self.pending:
+                        self.condition.notify()
+
+    def statistics(self):
+        with self.condition:
+            return {
+                'workers': self.workerCount,
+                'depth': len(self.pending),
+                'maxPending': self.maxPending,
+                'queued': self.queued,
+                'coalesced': self.coalesced,
+                'dropped': self.dropped,
+                'processed': self.processed,
+                'errors': self.errors,
+            }
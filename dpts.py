@@ -140,7 +140,7 @@ def de8(payload):
     return struct.unpack('>h', payload)[0]
 
 
-def en9(value):
+def _en9num(value):
     s = 0
     e = 0
     if value < 0:
@@ -149,8 +149,11 @@ def en9(value):
     while (m > 2047) or (m < -2048):
         e = e + 1
         m = m >> 1
-    num = s | (e << 11) | (int(m) & 0x07ff)
-    return en7(num)
+    return s | (e << 11) | (int(m) & 0x07ff)
+
+
+def en9(value):
+    return en7(_en9num(value))
 
 
 def de9(payload):
@@ -266,7 +269,7 @@ def de17(payload):
 
 
 def en17001(value):
-    return [0, (int(value) & 0x3f) - 1]
+    return [0, (int(value) - 1) & 0x3f]
 
 
 def de17001(payload):
@@ -275,6 +278,29 @@ def de17001(payload):
     return (struct.unpack('>B', payload)[0] & 0x3f) + 1
 
 
+def en19(dt):
+    ret = bytearray([0])
+    ret.extend(struct.pack('>BBBBBBBB', dt.year - 1900, dt.month, dt.day, (dt.isoweekday() << 5) | dt.hour,
+                           dt.minute, dt.second, _en19flags(dt), 0))
+    return ret
+
+
+def _en19flags(dt):
+    # no working day information, summer time from the timezone of dt if it has one
+    dst = dt.dst() if dt.tzinfo is not None else None
+    return 0x20 | (0x01 if dst else 0)
+
+
+def de19(payload):
+    if len(payload) != 8:
+        return None
+    if payload[6] & 0x80:
+        # fault flag
+        return None
+    return datetime.datetime(1900 + payload[0], payload[1] & 0x0f, payload[2] & 0x1f,
+                             payload[3] & 0x1f, payload[4] & 0x3f, payload[5] & 0x3f)
+
+
 def en20(value):
     return [0, int(value) & 0xff]
 
@@ -335,6 +361,7 @@ sizes = {
     '17': 1,
     '17001': 1,
     '17.001': 1,
+    '19': 8,
     '20': 1,
     '24': 100,
     '232': 3,
@@ -365,6 +392,7 @@ sizenames = {
     '17': '1 Byte',
     '17001': '1 Byte',
     '17.001': '1 Byte',
+    '19': '8 Bytes',
     '20': '1 Byte',
     '24': '100 Bytes',
     '232': '3 Bytes',
@@ -395,6 +423,7 @@ decode = {
     '17': de17,
     '17001': de17001,
     '17.001': de17001,
+    '19': de19,
     '20': de20,
     '24': de24,
     '232': de232,
@@ -425,8 +454,276 @@ encode = {
     '17': en17,
     '17001': en17001,
     '17.001': en17001,
+    '19': en19,
     '20': en20,
     '24': en24,
     '232': en232,
 }
+
+# index of the payload in the encoder output. The encoders of 1, 2, 3, 10 and 11 return the payload alone, the
+# others put the 0 byte in front of it that precedes it in a telegram. Received values never have that byte.
+payloadStart = dict((dpt, 0 if dpt in ('1', '2', '3', '10', '11') else 1) for dpt in encode)
 # DPT: 19, 28
+
+
+# The *_into encoders write the same bytes as the encoders above into a
+# preallocated buffer of at least encodedSizes[dpt] bytes and return the
+# number of bytes written, always encodedSizes[dpt].
+
+def en1_into(value, buf):
+    buf[0] = int(value) & 0x01
+    return 1
+
+
+def en2_into(payload, buf):
+    buf[0] = (payload[0] << 1) & 0x02 | payload[1] & 0x01
+    return 1
+
+
+def en3_into(vlist, buf):
+    buf[0] = (int(vlist[0]) << 3) & 0x08 | int(vlist[1]) & 0x07
+    return 1
+
+
+def en4002_into(value, buf):
+    if isinstance(value, str):
+        value = value.encode('iso-8859-1', 'replace')
+    else:
+        value = str(value)
+    buf[0] = 0
+    buf[1] = ord(value) & 0xff
+    return 2
+
+
+def en5_into(value, buf):
+    if value < 0:
+        value = 0
+    elif value > 255:
+        value = 255
+    buf[0] = 0
+    buf[1] = int(value) & 0xff
+    return 2
+
+
+def en5001_into(value, buf):
+    if value < 0:
+        value = 0
+    elif value > 100:
+        value = 100
+    buf[0] = 0
+    buf[1] = int(value * 255.0 / 100) & 0xff
+    return 2
+
+
+def en6_into(value, buf):
+    if value < -128:
+        value = -128
+    elif value > 127:
+        value = 127
+    struct.pack_into('>Bb', buf, 0, 0, int(value))
+    return 2
+
+
+def en7_into(value, buf):
+    struct.pack_into('>BH', buf, 0, 0, int(value))
+    return 3
+
+
+def en8_into(value, buf):
+    if value < -32768:
+        value = -32768
+    elif value > 32767:
+        value = 32767
+    struct.pack_into('>Bh', buf, 0, 0, int(value))
+    return 3
+
+
+def en9_into(value, buf):
+    return en7_into(_en9num(value), buf)
+
+
+def en10_into(dt, buf):
+    buf[0] = (dt.isoweekday() << 5) | dt.hour
+    buf[1] = dt.minute
+    buf[2] = dt.second
+    return 3
+
+
+def en11_into(date, buf):
+    buf[0] = date.day
+    buf[1] = date.month
+    buf[2] = date.year - 2000
+    return 3
+
+
+def en12_into(value, buf):
+    if value < 0:
+        value = 0
+    elif value > 4294967295:
+        value = 4294967295
+    struct.pack_into('>BI', buf, 0, 0, int(value))
+    return 5
+
+
+def en13_into(value, buf):
+    if value < -2147483648:
+        value = -2147483648
+    elif value > 2147483647:
+        value = 2147483647
+    struct.pack_into('>Bi', buf, 0, 0, int(value))
+    return 5
+
+
+def en14_into(value, buf):
+    struct.pack_into('>Bf', buf, 0, 0, value)
+    return 5
+
+
+def _string_into(raw, buf):
+    raw = raw[:14]
+    buf[0] = 0
+    buf[1:1 + len(raw)] = raw
+    buf[1 + len(raw):15] = bytes(14 - len(raw))
+    return 15
+
+
+def en16000_into(value, buf):
+    return _string_into(value.encode('ascii', 'replace'), buf)
+
+
+def en16001_into(value, buf):
+    return _string_into(value.encode('iso-8859-1', 'replace'), buf)
+
+
+def en17_into(value, buf):
+    buf[0] = 0
+    buf[1] = int(value) & 0x3f
+    return 2
+
+
+def en17001_into(value, buf):
+    buf[0] = 0
+    buf[1] = (int(value) - 1) & 0x3f
+    return 2
+
+
+def en19_into(dt, buf):
+    struct.pack_into('>BBBBBBBBB', buf, 0, 0, dt.year - 1900, dt.month, dt.day, (dt.isoweekday() << 5) | dt.hour,
+                     dt.minute, dt.second, _en19flags(dt), 0)
+    return 9
+
+
+def en20_into(value, buf):
+    buf[0] = 0
+    buf[1] = int(value) & 0xff
+    return 2
+
+
+def en232_into(value, buf):
+    buf[0] = 0
+    buf[1] = int(value[0]) & 0xff
+    buf[2] = int(value[1]) & 0xff
+    buf[3] = int(value[2]) & 0xff
+    return 4
+
+# DPT 24 has no fixed size and is only available through encode
+encodeInto = {
+    '1': en1_into,
+    '2': en2_into,
+    '3': en3_into,
+    '4002': en4002_into,
+    '4.002': en4002_into,
+    '5': en5_into,
+    '5001': en5001_into,
+    '5.001': en5001_into,
+    '6': en6_into,
+    '7': en7_into,
+    '8': en8_into,
+    '9': en9_into,
+    '10': en10_into,
+    '11': en11_into,
+    '12': en12_into,
+    '13': en13_into,
+    '14': en14_into,
+    '16000': en16000_into,
+    '16': en16000_into,
+    '16001': en16001_into,
+    '16.001': en16001_into,
+    '17': en17_into,
+    '17001': en17001_into,
+    '17.001': en17001_into,
+    '19': en19_into,
+    '20': en20_into,
+    '232': en232_into,
+}
+
+# length of the output of the encoders with a *_into variant
+encodedSizes = dict((dpt, sizes[dpt] + payloadStart[dpt]) for dpt in encodeInto)
+# sizes of DPT 14 is the object size of the knxprod, its payload has 4 bytes
+encodedSizes['14'] = 5
+
+
+class TableDecoder:
+    """
+    Decoder for DPTs with 1 or 2 byte payloads which returns the decoded value
+    from a table indexed by the raw payload. The table holds the result of the
+    scalar decoder for every possible payload and is built on first use.
+
+    decode is a plain function, an instance call would cost more than most
+    scalar decoders.
+    """
+    __slots__ = ('decoder', 'size', 'table', 'decode')
+
+    def __init__(self, decoder, size):
+        self.decoder = decoder
+        self.size = size
+        # filled in place by build, until then every lookup raises IndexError
+        self.table = rows = []
+
+        if size == 1:
+            def decode(payload):
+                if len(payload) != 1:
+                    return None
+                try:
+                    return rows[payload[0]]
+                except IndexError:
+                    return self.build()[payload[0]]
+        else:
+            def decode(payload):
+                if len(payload) != 2:
+                    return None
+                try:
+                    return rows[payload[0] << 8 | payload[1]]
+                except IndexError:
+                    return self.build()[payload[0] << 8 | payload[1]]
+
+        self.decode = decode
+
+    def build(self):
+        if self.size == 1:
+            table = [self.decoder(bytes((i,))) for i in range(0x100)]
+        else:
+            table = [self.decoder(bytes((i >> 8, i & 0xff))) for i in range(0x10000)]
+        # one assignment, threads building at the same time both store the same values
+        self.table[:] = table
+        return self.table
+
+    def __call__(self, payload):
+        return self.decode(payload)
+
+
+def _buildTableDecode(dptList):
+    # aliases like '5001' and '5.001' share one decoder and therefore one table
+    decoders = {}
+    result = {}
+    for dpt in dptList:
+        decoder = decode[dpt]
+        if decoder not in decoders:
+            decoders[decoder] = TableDecoder(decoder, sizes[dpt])
+        result[dpt] = decoders[decoder]
+    return result
+
+# only DPTs with immutable results, the list results of 2, 3 and 232 must not be shared.
+# 7 and 8 are a single unpack, a lookup in a 64k table is slower than that.
+tableDecode = _buildTableDecode(['1', '4002', '4.002', '5', '5001', '5.001', '6', '9',
+                                 '17', '17001', '17.001', '20'])
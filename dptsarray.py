@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG.
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG.  If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+"""
+Bulk encoding and decoding of many values of one DPT, e.g. for analysing
+recorded telegrams or archive data.
+
+decodeArray() takes the payloads either as a 2 dimensional uint8 array with
+one payload per row or as one bytes object with the payloads concatenated.
+encodeArray() returns the concatenated results of the scalar encoder.
+Both give the same results as dpts.decode and dpts.encode. If NumPy is
+not installed they fall back to calling the scalar functions per value.
+"""
+
+import struct
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from . import dpts
+
+# payload size of the supported DPTs as passed to the decoders
+payloadSizes = {
+    '1': 1,
+    '5': 1,
+    '5001': 1,
+    '5.001': 1,
+    '6': 1,
+    '7': 2,
+    '8': 2,
+    '9': 2,
+    '12': 4,
+    '13': 4,
+    '14': 4,
+    '17': 1,
+    '17001': 1,
+    '17.001': 1,
+    '20': 1,
+}
+
+# DPTs whose decoded values are read as big endian numbers directly
+_bufferTypes = {
+    '7': '>u2',
+    '8': '>i2',
+    '12': '>u4',
+    '13': '>i4',
+    '14': '>f4',
+}
+
+_tableTypes = {
+    '1': 'bool',
+    '5': 'int64',
+    '5001': 'float64',
+    '5.001': 'float64',
+    '6': 'int64',
+    '9': 'float64',
+    '17': 'int64',
+    '17001': 'int64',
+    '17.001': 'int64',
+    '20': 'int64',
+}
+
+_arrayTables = {}
+
+
+def available():
+    return np is not None
+
+
+def _payloadRows(dpt, payloads):
+    size = payloadSizes[dpt]
+    if isinstance(payloads, np.ndarray):
+        rows = payloads.astype(np.uint8, copy=False)
+    else:
+        rows = np.frombuffer(bytes(payloads), dtype=np.uint8)
+    return rows.reshape(-1, size)
+
+
+def _arrayTable(dpt):
+    # the numpy table is built from the scalar table so both give identical values
+    tableDecoder = dpts.tableDecode[dpt]
+    table = _arrayTables.get(tableDecoder)
+    if table is None:
+        scalarTable = tableDecoder.table or tableDecoder.build()
+        table = np.array(scalarTable, dtype=_tableTypes[dpt])
+        _arrayTables[tableDecoder] = table
+    return table
+
+
+def decodeArray(dpt, payloads):
+    """
+    Decode many payloads of one DPT
+
+    :param dpt: data point type as used in knx_dpt
+    :param payloads: uint8 array with one payload per row or the payloads concatenated to one bytes object
+    :return: numpy array of the decoded values, a list if NumPy is not installed
+    """
+    dpt = str(dpt)
+    if dpt not in payloadSizes:
+        raise ValueError("bulk decoding of dpt {} is not supported".format(dpt))
+
+    if np is None:
+        size = payloadSizes[dpt]
+        payloads = bytes(payloads)
+        if len(payloads) % size:
+            # as the reshape of the NumPy path
+            raise ValueError("{} bytes are no whole number of dpt {} payloads".format(len(payloads), dpt))
+        decoder = dpts.decode[dpt]
+        return [decoder(payloads[i:i + size]) for i in range(0, len(payloads), size)]
+
+    rows = _payloadRows(dpt, payloads)
+    if dpt in _bufferTypes:
+        values = np.frombuffer(rows.tobytes(), dtype=_bufferTypes[dpt])
+        if dpt == '14':
+            # signalling NaN payloads would otherwise raise a warning
+            with np.errstate(invalid='ignore'):
+                return values.astype(np.float64)
+        return values.astype(np.int64)
+
+    if rows.shape[1] == 1:
+        index = rows[:, 0]
+    else:
+        index = rows[:, 0].astype(np.uint16) << 8 | rows[:, 1]
+    return _arrayTable(dpt)[index]
+
+
+def _clip(values, low, high):
+    return np.minimum(np.maximum(values, low), high)
+
+
+def _toInt(values):
+    # int() truncates towards zero and fails for NaN
+    if np.isnan(values).any():
+        raise ValueError("cannot convert float NaN to integer")
+    return np.trunc(values).astype(np.int64)
+
+
+def _checkRange(ints, low, high):
+    if (ints < low).any() or (ints > high).any():
+        raise struct.error("value out of range {} <= number <= {}".format(low, high))
+
+
+def _en9(values):
+    sign = np.where(values < 0, 0x8000, 0)
+    m = _toInt(values * 100)
+    e = np.zeros_like(m)
+    # same mantissa/exponent loop as en9, >> on int64 rounds towards -inf like on int
+    mask = (m > 2047) | (m < -2048)
+    while mask.any():
+        e[mask] += 1
+        m[mask] >>= 1
+        mask = (m > 2047) | (m < -2048)
+    num = sign | (e << 11) | (m & 0x07ff)
+    _checkRange(num, 0, 0xffff)
+    return num
+
+
+def _packed(ints, dtype):
+    # a leading zero byte per value, followed by the big endian number
+    size = np.dtype(dtype).itemsize
+    rows = np.zeros((len(ints), size + 1), dtype=np.uint8)
+    rows[:, 1:] = ints.astype(dtype).view(np.uint8).reshape(-1, size)
+    return rows
+
+
+def encodeArray(dpt, values):
+    """
+    Encode many values of one DPT
+
+    :param dpt: data point type as used in knx_dpt
+    :param values: sequence or numpy array of values
+    :return: the results of dpts.encode for every value concatenated to one bytes object
+    """
+    dpt = str(dpt)
+    if dpt not in payloadSizes or dpt in ('17001', '17.001'):
+        raise ValueError("bulk encoding of dpt {} is not supported".format(dpt))
+
+    if np is None:
+        encoder = dpts.encode[dpt]
+        return b''.join(bytes(encoder(value)) for value in values)
+
+    values = np.asarray(values, dtype=np.float64).reshape(-1)
+
+    if dpt == '1':
+        return (_toInt(values) & 0x01).astype(np.uint8).tobytes()
+    elif dpt == '5':
+        ints = _toInt(_clip(values, 0, 255)) & 0xff
+        rows = _packed(ints, '>u1')
+    elif dpt in ('5001', '5.001'):
+        ints = _toInt(_clip(values, 0, 100) * 255.0 / 100) & 0xff
+        rows = _packed(ints, '>u1')
+    elif dpt == '6':
+        rows = _packed(_toInt(_clip(values, -128, 127)), '>i1')
+    elif dpt == '7':
+        ints = _toInt(values)
+        _checkRange(ints, 0, 0xffff)
+        rows = _packed(ints, '>u2')
+    elif dpt == '8':
+        rows = _packed(_toInt(_clip(values, -32768, 32767)), '>i2')
+    elif dpt == '9':
+        rows = _packed(_en9(values), '>u2')
+    elif dpt == '12':
+        rows = _packed(_toInt(_clip(values, 0, 4294967295)), '>u4')
+    elif dpt == '13':
+        rows = _packed(_toInt(_clip(values, -2147483648, 2147483647)), '>i4')
+    elif dpt == '14':
+        with np.errstate(over='ignore'):
+            floats = values.astype('>f4')
+        if (np.isinf(floats) & np.isfinite(values)).any():
+            raise OverflowError("float too large to pack with f format")
+        rows = np.zeros((len(values), 5), dtype=np.uint8)
+        rows[:, 1:] = floats.view(np.uint8).reshape(-1, 4)
+    else:
+        # 17 and 20
+        mask = 0x3f if dpt == '17' else 0xff
+        rows = _packed(_toInt(values) & mask, '>u1')
+
+    return rows.tobytes()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG.
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG.  If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+import logging
+import threading
+import time
+
+
+class InitReader:
+    """
+    Initial read requests after the start of the stack, issued by the plugin
+    instead of the ReadOnInit flag of the device.
+
+    Reads go out in order of descending priority. At most window reads wait
+    for their answer at the same time and at most rate reads are sent per
+    second. A read without answer frees its slot in the window after timeout
+    seconds.
+    """
+
+    def __init__(self, reader, rate=10, window=5, timeout=5, name='knx_ets'):
+        self.logger = logging.getLogger(__name__)
+        self.reader = reader
+        self.rate = rate
+        self.window = max(1, window)
+        self.timeout = timeout
+        self.name = name
+        self.condition = threading.Condition()
+        self.queue = []
+        # key -> time the read was sent
+        self.outstanding = {}
+        self.thread = None
+        self.running = False
+
+        self.total = 0
+        self.sent = 0
+        self.answered = 0
+        self.timedOut = 0
+        self.started = None
+        self.finished = None
+
+    def add(self, key, priority=0):
+        self.queue.append((priority, key))
+
+    def start(self):
+        # stable sort keeps the GO order within one priority
+        self.queue.sort(key=lambda entry: -entry[0])
+        self.total = len(self.queue)
+        self.running = True
+        self.started = time.monotonic()
+        self.thread = threading.Thread(target=self.work, name=self.name + ".initread", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join(5)
+            self.thread = None
+
+    def expire(self, now):
+        for key, sentAt in list(self.outstanding.items()):
+            if now - sentAt >= self.timeout:
+                del self.outstanding[key]
+                self.timedOut += 1
+
+    def work(self):
+        interval = 1.0 / self.rate if self.rate > 0 else 0
+        nextSend = 0
+        position = 0
+        while True:
+            with self.condition:
+                while True:
+                    if not self.running:
+                        return
+                    now = time.monotonic()
+                    self.expire(now)
+                    if position >= len(self.queue) and not self.outstanding:
+                        self.finished = now
+                        self.logger.info("{}: initial reads finished after {:.1f}s, {} answered, {} timed out".format(
+                            self.name, now - self.started, self.answered, self.timedOut))
+                        return
+                    if position < len(self.queue) and len(self.outstanding) < self.window and now >= nextSend:
+                        break
+                    waits = [sentAt + self.timeout - now for sentAt in self.outstanding.values()]
+                    if position < len(self.queue) and len(self.outstanding) < self.window:
+                        waits.append(nextSend - now)
+                    self.condition.wait(max(0.01, min(waits)))
+
+                key = self.queue[position][1]
+                position += 1
+                self.outstanding[key] = now
+                self.sent += 1
+                nextSend = now + interval
+
+            try:
+                self.reader(key)
+            except Exception as e:
+                self.logger.error("{}: initial read request failed: {}".format(self.name, e))
+
+    def answer(self, key):
+        """
+        Called for every received value, frees the window slot of a pending read of key
+        """
+        if key not in self.outstanding:
+            return
+        with self.condition:
+            if self.outstanding.pop(key, None) is not None:
+                self.answered += 1
+                self.condition.notify()
+
+    def statistics(self):
+        with self.condition:
+            if self.started is None:
+                elapsed = 0
+            else:
+                elapsed = (self.finished or time.monotonic()) - self.started
+            return {
+                'total': self.total,
+                'sent': self.sent,
+                'answered': self.answered,
+                'timed out': self.timedOut,
+                'outstanding': len(self.outstanding),
+                'progress': "{}%".format(int(100 * self.sent / self.total) if self.total else 100),
+                'elapsed': round(elapsed, 1),
+                'finished': self.finished is not None,
+            }
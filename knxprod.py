@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG.
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG.  If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+"""
+Streaming reader and writer for the knxprod XML.
+
+Neither scan() nor write() builds a tree of the document, they handle one
+SAX event at a time. Memory use therefore does not grow with the number of
+ComObjects already in the file, apart from the GO number to text and
+properties mappings returned by scan().
+"""
+
+import os
+import xml.sax
+from xml.sax.handler import ContentHandler, feature_namespaces
+from xml.sax.saxutils import XMLGenerator
+from xml.sax.xmlreader import AttributesNSImpl
+
+KNX_NS = 'http://knx.org/xml/project/11'
+
+# elements whose Id/RefId references the application program
+APP_REFERENCES = {
+    'CatalogItem': ('Id', 'Hardware2ProgramRefId'),
+    'Hardware2Program': ('Id',),
+    'ApplicationProgramRef': ('RefId',),
+    'RelativeSegment': ('Id',),
+}
+
+# ComObject attributes derived from the item, compared with the knxprod on every generation
+COM_OBJECT_PROPERTIES = ('ObjectSize', 'ReadFlag', 'WriteFlag', 'UpdateFlag', 'CommunicationFlag', 'TransmitFlag',
+                         'ReadOnInitFlag')
+
+ATTRIBUTE_ESCAPES = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;',
+                                   '\n': '&#10;', '\r': '&#13;', '\t': '&#9;'})
+
+
+def _parse(path, handler):
+    parser = xml.sax.make_parser()
+    parser.setFeature(feature_namespaces, True)
+    parser.setContentHandler(handler)
+    parser.parse(path)
+
+
+class KnxProdScanner(ContentHandler):
+    """
+    Collects the application program id and version, the GO number to
+    ComObject text mapping and the values of the COM_OBJECT_PROPERTIES of
+    every ComObject of a knxprod
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.appId = None
+        self.version = None
+        self.goTexts = {}
+        self.properties = {}
+        # the properties take only a few distinct values, every ComObject shares them
+        self.values = {}
+
+    def startElementNS(self, name, qname, attrs):
+        localname = name[1]
+        if localname == 'ComObject':
+            goNr = int(attrs.get((None, 'Number')))
+            self.goTexts[goNr] = attrs.get((None, 'Text'))
+            values = self.values
+            self.properties[goNr] = tuple(values.setdefault(value, value)
+                                          for value in (attrs.get((None, key)) for key in COM_OBJECT_PROPERTIES))
+        elif localname == 'ApplicationProgram':
+            self.appId = attrs.get((None, 'Id'))
+            self.version = int(attrs.get((None, 'ApplicationVersion')))
+
+
+def scan(path):
+    scanner = KnxProdScanner()
+    _parse(path, scanner)
+    return scanner
+
+
+class KnxProdWriter(ContentHandler):
+    """
+    Copies a knxprod event by event while renaming the application program,
+    dropping the ComObjects of removed GO numbers with their ComObjectRefs and
+    ComObjectRefRefs, updating attributes of changed ComObjects and appending
+    new ones
+    """
+
+    def __init__(self, out, appId, newAppId, version, comObjects, removed=(), changed=None):
+        super().__init__()
+        self.out = out
+        self.generator = XMLGenerator(out, 'utf-8', short_empty_elements=True)
+        self.appId = appId
+        self.newAppId = newAppId
+        self.version = version
+        self.comObjects = comObjects
+        self.removed = set(removed)
+        self.changed = changed or {}
+        # Ids of the dropped ComObjects and ComObjectRefs, the Static section with the
+        # ComObjectTable and ComObjectRefs precedes the ComObjectRefRefs in the Dynamic section
+        self.removedIds = set()
+        self.skipDepth = 0
+        self.depth = 0
+        self.pending = []
+
+    def flush(self):
+        if self.pending:
+            self.generator.characters(''.join(self.pending))
+            self.pending = []
+
+    def startDocument(self):
+        self.generator.startDocument()
+
+    def endDocument(self):
+        self.flush()
+        self.generator.endDocument()
+
+    def startPrefixMapping(self, prefix, uri):
+        self.generator.startPrefixMapping(prefix, uri)
+
+    def endPrefixMapping(self, prefix):
+        self.generator.endPrefixMapping(prefix)
+
+    def characters(self, content):
+        if not self.skipDepth:
+            self.pending.append(content)
+
+    def ignorableWhitespace(self, whitespace):
+        if not self.skipDepth:
+            self.pending.append(whitespace)
+
+    def isRemoved(self, localname, attrs):
+        if localname == 'ComObject':
+            if int(attrs.get((None, 'Number'))) not in self.removed:
+                return False
+        elif localname == 'ComObjectRef':
+            if attrs.get((None, 'RefId')) not in self.removedIds:
+                return False
+        elif localname == 'ComObjectRefRef':
+            return attrs.get((None, 'RefId')) in self.removedIds
+        else:
+            return False
+        self.removedIds.add(attrs.get((None, 'Id')))
+        return True
+
+    def startElementNS(self, name, qname, attrs):
+        localname = name[1]
+        if self.skipDepth or self.isRemoved(localname, attrs):
+            if not self.skipDepth:
+                # the indentation of the dropped element
+                self.pending = []
+            self.skipDepth += 1
+            return
+
+        self.flush()
+        values = dict(attrs.items())
+        qnames = dict((key, attrs.getQNameByName(key)) for key in attrs.keys())
+
+        if localname == 'ApplicationProgram':
+            values[(None, 'Id')] = self.newAppId
+            values[(None, 'ApplicationVersion')] = str(self.version + 1)
+            values[(None, 'ReplacesVersions')] = str(self.version)
+            qnames[(None, 'ReplacesVersions')] = 'ReplacesVersions'
+        elif localname == 'ComObject' and int(values[(None, 'Number')]) in self.changed:
+            for attribute, value in self.changed[int(values[(None, 'Number')])].items():
+                values[(None, attribute)] = value
+                qnames[(None, attribute)] = attribute
+        elif localname in APP_REFERENCES:
+            for attribute in APP_REFERENCES[localname]:
+                key = (None, attribute)
+                values[key] = values[key].replace(self.appId[9:], self.newAppId[9:])
+
+        self.generator.startElementNS(name, qname, AttributesNSImpl(values, qnames))
+        self.depth += 1
+
+    def endElementNS(self, name, qname):
+        if self.skipDepth:
+            self.skipDepth -= 1
+            return
+
+        self.depth -= 1
+        localname = name[1]
+        if localname == 'ComObjectTable':
+            self.appendChildren('ComObject', self.comObjects())
+        elif localname == 'ComObjectRefs':
+            self.appendChildren('ComObjectRef', (self.comObjectRef(attributes) for attributes in self.comObjects()))
+        elif localname == 'ChannelIndependentBlock':
+            self.appendChildren('ComObjectRefRef', (self.comObjectRefRef(attributes) for attributes in self.comObjects()))
+        else:
+            self.flush()
+        self.generator.endElementNS(name, qname)
+
+    def comObjectRef(self, attributes):
+        return {'Id': attributes['Id'] + "_R-" + attributes['Number'], 'RefId': attributes['Id']}
+
+    def comObjectRefRef(self, attributes):
+        return {'RefId': attributes['Id'] + "_R-" + attributes['Number']}
+
+    def appendChildren(self, tag, children):
+        # the whitespace before the end tag is replaced by our own indentation
+        text = ''.join(self.pending)
+        self.pending = []
+        if text.strip():
+            self.generator.characters(text)
+        childIndent = '\n' + '  ' * (self.depth + 1)
+        appended = False
+        for attributes in children:
+            appended = True
+            # the indentation goes through the generator to close a pending start tag of the
+            # container, the child itself is written directly which is a lot faster
+            self.generator.characters(childIndent)
+            self.out.write('<' + tag + ''.join(
+                ' ' + key + '="' + value.translate(ATTRIBUTE_ESCAPES) + '"' for key, value in attributes.items()) + '/>')
+        if appended or text:
+            self.generator.characters('\n' + '  ' * self.depth)
+
+
+def write(sourcePath, targetPath, appId, newAppId, version, comObjects, removed=(), changed=None):
+    """
+    Write a copy of sourcePath with the new application program id and version to targetPath
+
+    :param comObjects: callable returning a fresh iterable of attribute dicts of the ComObjects to append
+    :param removed: GO numbers whose ComObjects are left out
+    :param changed: dict GO number -> dict of ComObject attributes to set
+    """
+    tmpPath = targetPath + '.tmp'
+    with open(tmpPath, 'w', encoding='utf-8') as out:
+        _parse(sourcePath, KnxProdWriter(out, appId, newAppId, version, comObjects, removed, changed))
+    os.replace(tmpPath, targetPath)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG.
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG.  If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+"""
+Pure python stand-in for the native knx module, used with stack: simulated.
+
+Stack has the functions of the module and GroupObject the API the plugin
+uses. It behaves as a device programmed by ETS with every GO linked and
+never touches a bus. Telegrams are injected with receive(), values written
+by the plugin are counted and handed to the optional onWrite hook.
+"""
+
+import threading
+
+
+class GroupObject:
+
+    def __init__(self, stack, goNr):
+        self._stack = stack
+        self._asap = goNr
+        self._value = b''
+        self._callBack = None
+
+    def asap(self):
+        return self._asap
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._value = bytes(value)
+        self._stack.writes += 1
+        if self._stack.onWrite is not None:
+            self._stack.onWrite(self._asap, self._value)
+
+    def callBack(self, callBack):
+        self._callBack = callBack
+
+    def requestObjectRead(self):
+        self._stack.reads += 1
+        if self._stack.onRead is not None:
+            self._stack.onRead(self._asap)
+
+
+class Stack:
+    """
+    One simulated device. Unlike the native module, which is a single
+    device per process, every plugin instance gets a stack of its own.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.groupObjects = {}
+        self.flashFilePath = ''
+        self.programMode = False
+        self.running = False
+        # called with (goNr, value) for every value written by the plugin
+        self.onWrite = None
+        # called with goNr for every read request of the plugin
+        self.onRead = None
+        self.writes = 0
+        self.reads = 0
+
+    def Prepare(self, args):
+        pass
+
+    def FlashFilePath(self, path=None):
+        if path is not None:
+            self.flashFilePath = path
+        return self.flashFilePath
+
+    def ReadMemory(self):
+        pass
+
+    def Configured(self):
+        return True
+
+    def ProgramMode(self, on=None):
+        if on is not None:
+            self.programMode = bool(on)
+        return self.programMode
+
+    def Start(self):
+        self.running = True
+
+    def Stop(self):
+        self.running = False
+
+    def GetGroupObject(self, goNr):
+        with self.lock:
+            groupObject = self.groupObjects.get(goNr)
+            if groupObject is None:
+                groupObject = self.groupObjects[goNr] = GroupObject(self, goNr)
+            return groupObject
+
+    def receive(self, goNr, value):
+        """
+        Deliver a telegram for goNr as the stack would: set the value without counting it as a write and call
+        the callback in the calling thread
+        """
+        groupObject = self.GetGroupObject(goNr)
+        groupObject._value = bytes(value)
+        if self.running and groupObject._callBack is not None:
+            groupObject._callBack(groupObject)
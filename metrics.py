@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG.
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG.  If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+import bisect
+
+# upper bounds of the latency buckets in seconds, the last bucket takes everything above
+LATENCY_BOUNDS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+
+
+class LatencyHistogram:
+    """
+    Counts latencies in fixed buckets, adding one costs a bisect and an increment
+    """
+
+    def __init__(self, bounds=LATENCY_BOUNDS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def add(self, seconds):
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.total += seconds
+        if seconds > self.maximum:
+            self.maximum = seconds
+
+    def count(self):
+        return sum(self.counts)
+
+    def buckets(self):
+        """
+        :return: list of (label, count), labels are the upper bounds in ms
+        """
+        labels = ["<= {:g} ms".format(bound * 1000) for bound in self.bounds]
+        labels.append("> {:g} ms".format(self.bounds[-1] * 1000))
+        return list(zip(labels, self.counts))
+
+    def toDict(self):
+        count = self.count()
+        return {
+            'count': count,
+            'mean_ms': round(self.total / count * 1000, 3) if count else None,
+            'max_ms': round(self.maximum * 1000, 3),
+            'buckets': dict(self.buckets()),
+        }
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG.
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG.  If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+import collections
+import logging
+import threading
+import time
+import zlib
+
+
+class PollEntry:
+    __slots__ = ('key', 'name', 'interval', 'dueTick', 'backoff', 'awaiting', 'lastRead',
+                 'achieved', 'reads', 'answers', 'misses')
+
+    def __init__(self, key, name, interval):
+        self.key = key
+        self.name = name
+        self.interval = interval
+        self.dueTick = 0
+        self.backoff = 1
+        self.awaiting = False
+        self.lastRead = None
+        self.achieved = None
+        self.reads = 0
+        self.answers = 0
+        self.misses = 0
+
+
+class PollScheduler:
+    """
+    Periodic read requests on a timing wheel with one slot per tick (second).
+
+    The first read of every GO is delayed by a phase derived from its key, so
+    GOs with the same interval are spread over the interval instead of being
+    read in the same second, and the spreading is the same after a restart.
+    At most maxRate reads are issued per tick, due reads beyond that wait in
+    a backlog for the next ticks. A GO that did not answer its last read is
+    read at twice its interval, up to maxBackoff times the interval.
+    """
+
+    def __init__(self, reader, maxRate=0, maxBackoff=16, wheelSize=256, name='knx_ets'):
+        self.logger = logging.getLogger(__name__)
+        self.reader = reader
+        self.maxRate = maxRate
+        self.maxBackoff = max(1, maxBackoff)
+        self.name = name
+        self.lock = threading.Lock()
+        self.wheel = [[] for i in range(wheelSize)]
+        self.tickNr = 0
+        self.backlog = collections.deque()
+        self.entries = {}
+
+    def add(self, key, name, interval):
+        interval = max(1, int(interval))
+        entry = PollEntry(key, name, interval)
+        phase = zlib.crc32(name.encode()) % interval
+        with self.lock:
+            self.entries[key] = entry
+            entry.dueTick = self.tickNr + 1 + phase
+            self.schedule(entry)
+
+    def schedule(self, entry):
+        self.wheel[entry.dueTick % len(self.wheel)].append(entry)
+
+    def tick(self):
+        """
+        Called once per second by the scheduler of SmartHomeNG
+        """
+        now = time.monotonic()
+        with self.lock:
+            self.tickNr += 1
+            slot = self.wheel[self.tickNr % len(self.wheel)]
+            # entries further ahead than one turn of the wheel stay in the slot
+            self.backlog.extend(entry for entry in slot if entry.dueTick <= self.tickNr)
+            slot[:] = [entry for entry in slot if entry.dueTick > self.tickNr]
+
+            count = len(self.backlog)
+            if self.maxRate > 0:
+                count = min(count, int(self.maxRate))
+            reads = [self.backlog.popleft() for i in range(count)]
+
+            for entry in reads:
+                if entry.awaiting:
+                    entry.misses += 1
+                    entry.backoff = min(entry.backoff * 2, self.maxBackoff)
+                else:
+                    entry.backoff = 1
+                if entry.lastRead is not None:
+                    gap = now - entry.lastRead
+                    entry.achieved = gap if entry.achieved is None else 0.8 * entry.achieved + 0.2 * gap
+                entry.lastRead = now
+                entry.reads += 1
+                entry.awaiting = True
+                entry.dueTick = self.tickNr + entry.interval * entry.backoff
+                self.schedule(entry)
+
+        for entry in reads:
+            try:
+                self.reader(entry.key)
+            except Exception as e:
+                self.logger.error("{}: read request for {} failed: {}".format(self.name, entry.name, e))
+
+    def answered(self, key):
+        """
+        Called for every received value, marks a pending read of key as answered
+        """
+        entry = self.entries.get(key)
+        if entry is not None and entry.awaiting:
+            entry.awaiting = False
+            entry.answers += 1
+
+    def statistics(self):
+        with self.lock:
+            return {
+                'gos': len(self.entries),
+                'backlog': len(self.backlog),
+                'reads': sum(entry.reads for entry in self.entries.values()),
+                'answers': sum(entry.answers for entry in self.entries.values()),
+                'misses': sum(entry.misses for entry in self.entries.values()),
+            }
+
+    def goStatistics(self):
+        """
+        :return: list of dicts with requested and achieved interval per polled GO
+        """
+        with self.lock:
+            return [{
+                'name': entry.name,
+                'interval': entry.interval,
+                'effective': entry.interval * entry.backoff,
+                'achieved': None if entry.achieved is None else round(entry.achieved, 1),
+                'reads': entry.reads,
+                'answers': entry.answers,
+                'misses': entry.misses,
+            } for entry in self.entries.values()]
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG.
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG.  If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+"""
+Binary log of GO telegrams.
+
+The file starts with MAGIC and the version, followed by one record per
+telegram: microseconds since the previous record (saturating at about 71
+minutes), GO number, direction and length of the raw value, then the raw
+value itself. A one byte value takes 9 bytes.
+"""
+
+import struct
+import threading
+import time
+
+MAGIC = b'KNXR'
+VERSION = 1
+FILE_HEADER = struct.Struct('<4sH')
+RECORD = struct.Struct('<IHBB')
+
+RX = 0
+TX = 1
+MAX_DELTA = 0xffffffff
+
+
+class Recorder:
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = open(path, 'wb')
+        self.file.write(FILE_HEADER.pack(MAGIC, VERSION))
+        self.last = time.monotonic()
+        self.records = 0
+
+    def record(self, goNr, direction, rawValue):
+        with self.lock:
+            if self.file is None:
+                return
+            now = time.monotonic()
+            delta = min(int((now - self.last) * 1000000), MAX_DELTA)
+            self.last = now
+            self.file.write(RECORD.pack(delta, goNr, direction, len(rawValue)))
+            self.file.write(rawValue)
+            self.records += 1
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+def read(path):
+    """
+    :return: generator of (seconds since the first record, goNr, direction, raw value)
+    """
+    with open(path, 'rb') as log:
+        magic, version = FILE_HEADER.unpack(log.read(FILE_HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("{} is not a telegram log of version {}".format(path, VERSION))
+        offset = 0
+        first = True
+        while True:
+            header = log.read(RECORD.size)
+            if len(header) < RECORD.size:
+                return
+            delta, goNr, direction, size = RECORD.unpack(header)
+            rawValue = log.read(size)
+            if len(rawValue) < size:
+                return
+            # the delta of the first record is the time between opening the log and the first telegram
+            offset = 0 if first else offset + delta / 1000000
+            first = False
+            yield offset, goNr, direction, rawValue
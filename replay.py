@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG.
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG.  If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+import logging
+import threading
+import time
+
+from . import recorder
+
+
+def percentile(samples, fraction):
+    """
+    :param samples: sorted list
+    """
+    if not samples:
+        return None
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+
+class Replayer:
+    """
+    Feeds the received telegrams of a telegram log into receive(goNr, rawValue).
+
+    With speed 1 the telegrams keep their recorded spacing, with speed N
+    they come N times faster and with speed 0 as fast as receive() returns.
+    The latency of a telegram is the time receive() takes, which covers the
+    whole callback of the plugin up to setting the item, or up to the hand
+    over to the dispatcher if dispatch_workers is set.
+    """
+
+    def __init__(self, receive, path, speed=1, name='knx_ets'):
+        self.logger = logging.getLogger(__name__)
+        self.receive = receive
+        self.path = path
+        self.speed = speed
+        self.name = name
+        self.thread = None
+        self.running = False
+
+        self.replayed = 0
+        self.latencies = []
+        self.maxLag = 0.0
+        self.started = None
+        self.finished = None
+        self.error = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.work, name=self.name + ".replay", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(5)
+            self.thread = None
+
+    def work(self):
+        try:
+            telegrams = [(offset, goNr, rawValue) for offset, goNr, direction, rawValue in recorder.read(self.path)
+                         if direction == recorder.RX]
+        except (OSError, ValueError) as e:
+            self.error = str(e)
+            self.logger.error("{}: cannot replay {}: {}".format(self.name, self.path, e))
+            return
+
+        self.started = time.perf_counter()
+        for offset, goNr, rawValue in telegrams:
+            if not self.running:
+                break
+            if self.speed > 0:
+                due = self.started + offset / self.speed
+                wait = due - time.perf_counter()
+                if wait > 0:
+                    time.sleep(wait)
+                else:
+                    self.maxLag = max(self.maxLag, -wait)
+            begin = time.perf_counter()
+            self.receive(goNr, rawValue)
+            self.latencies.append(time.perf_counter() - begin)
+            self.replayed += 1
+        self.finished = time.perf_counter()
+        self.logger.info("{}: replay of {} finished: {}".format(self.name, self.path, self.statistics()))
+
+    def statistics(self):
+        if self.started is None:
+            elapsed = 0
+        else:
+            elapsed = (self.finished or time.perf_counter()) - self.started
+        latencies = sorted(self.latencies)
+
+        def ms(seconds):
+            return None if seconds is None else round(seconds * 1000, 3)
+
+        return {
+            'file': self.path,
+            'speed': self.speed if self.speed > 0 else 'max',
+            'replayed': self.replayed,
+            'elapsed': round(elapsed, 3),
+            'telegrams/s': round(self.replayed / elapsed) if elapsed else None,
+            'latency p50 ms': ms(percentile(latencies, 0.5)),
+            'latency p90 ms': ms(percentile(latencies, 0.9)),
+            'latency p99 ms': ms(percentile(latencies, 0.99)),
+            'latency max ms': ms(latencies[-1] if latencies else None),
+            'max lag ms': ms(self.maxLag),
+            'finished': self.finished is not None,
+            'error': self.error,
+        }
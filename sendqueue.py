@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG.
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG.  If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+import logging
+import threading
+import time
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+
+
+class SendScheduler:
+    """
+    Rate limited sending of GO values from a thread of its own.
+
+    At most one value per GO is pending, a newer value replaces the pending
+    one (last value wins). Telegrams leave at no more than rate per second
+    with bursts of up to burst telegrams, a GO is not sent again before its
+    minimum interval has passed. Pending high priority values are always sent
+    before normal ones. If maxPending GOs are pending, a new normal priority
+    value is dropped, a high priority value displaces the oldest normal one.
+    dropHandler is called with the key and value of every dropped value, with
+    the lock of the scheduler held.
+    """
+
+    def __init__(self, writer, rate=0, burst=5, maxPending=1000, name='knx_ets', dropHandler=None):
+        self.logger = logging.getLogger(__name__)
+        self.writer = writer
+        self.dropHandler = dropHandler
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.maxPending = max(1, maxPending)
+        self.name = name
+        self.condition = threading.Condition()
+        # key -> (value, minInterval), one dict per priority
+        self.pending = ({}, {})
+        self.lastSent = {}
+        self.tokens = float(self.burst)
+        self.refilled = time.monotonic()
+        self.thread = None
+        self.running = False
+
+        self.queued = 0
+        self.merged = 0
+        self.dropped = 0
+        self.sent = 0
+        self.errors = 0
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.work, name=self.name + ".send", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join(5)
+            self.thread = None
+
+    def depth(self):
+        return len(self.pending[PRIORITY_HIGH]) + len(self.pending[PRIORITY_NORMAL])
+
+    def put(self, key, value, priority=PRIORITY_NORMAL, minInterval=0):
+        with self.condition:
+            if self.enqueue(key, value, priority, minInterval):
+                self.condition.notify()
+
+    def putMany(self, values):
+        """
+        Queue a batch with a single acquisition of the lock
+
+        :param values: list of (key, value, priority, minInterval)
+        """
+        with self.condition:
+            queued = False
+            for key, value, priority, minInterval in values:
+                queued = self.enqueue(key, value, priority, minInterval) or queued
+            if queued:
+                self.condition.notify()
+
+    def enqueue(self, key, value, priority, minInterval):
+        """
+        :return: True if a new key was queued, the caller holds the lock
+        """
+        queue = self.pending[priority]
+        if key in queue:
+            queue[key] = (value, minInterval)
+            self.merged += 1
+            return False
+
+        if self.depth() >= self.maxPending:
+            normal = self.pending[PRIORITY_NORMAL]
+            if priority == PRIORITY_NORMAL or not normal:
+                self.drop(key, value)
+                return False
+            oldest = next(iter(normal))
+            self.drop(oldest, normal.pop(oldest)[0])
+
+        queue[key] = (value, minInterval)
+        self.queued += 1
+        return True
+
+    def drop(self, key, value):
+        self.dropped += 1
+        if self.dropHandler is not None:
+            self.dropHandler(key, value)
+
+    def refill(self, now):
+        if self.rate > 0:
+            self.tokens = min(self.burst, self.tokens + (now - self.refilled) * self.rate)
+        else:
+            self.tokens = self.burst
+        self.refilled = now
+
+    def nextEligible(self, now):
+        """
+        :return: (priority, key) of the next value to send, or (None, seconds until one becomes eligible)
+        """
+        wait = None
+        for priority, queue in enumerate(self.pending):
+            for key, (value, minInterval) in queue.items():
+                due = self.lastSent.get(key, 0) + minInterval
+                if due <= now:
+                    return priority, key
+                if wait is None or due - now < wait:
+                    wait = due - now
+        return None, wait
+
+    def work(self):
+        while True:
+            with self.condition:
+                while True:
+                    if not self.running:
+                        return
+                    now = time.monotonic()
+                    self.refill(now)
+                    if self.tokens < 1:
+                        self.condition.wait((1 - self.tokens) / self.rate)
+                        continue
+                    priority, key = self.nextEligible(now)
+                    if priority is not None:
+                        break
+                    self.condition.wait(key)
+
+                value, minInterval = self.pending[priority].pop(key)
+                self.tokens -= 1
+                self.lastSent[key] = now
+
+            try:
+                self.writer(key, value)
+                self.sent += 1
+            except Exception as e:
+                self.errors += 1
+                self.logger.exception("{}: sending {} failed: {}".format(self.name, key, e))
+
+    def statistics(self):
+        with self.condition:
+            return {
+                'rate': self.rate,
+                'depth': self.depth(),
+                'maxPending': self.maxPending,
+                'queued': self.queued,
+                'merged': self.merged,
+                'dropped': self.dropped,
+                'sent': self.sent,
+                'errors': self.errors,
+            }
@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG.
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG.  If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+"""
+The knx stack in a child process, used with stack: process.
+
+ProcessStack offers the functions of the knx module to the plugin and runs
+the module itself in a child process started from this file. Both sides
+exchange fixed size records through two single producer, single consumer
+rings in a shared memory segment: telegrams from the child to the plugin,
+writes, read requests and commands from the plugin to the child. A byte
+written to a pipe wakes the other side when a ring turns non-empty. The
+child publishes its state and a heartbeat in a status block of the
+segment, the plugin restarts it if it exits or its heartbeat stops.
+
+The child only needs the standard library and the knx module, it does not
+import SmartHomeNG.
+"""
+
+import logging
+import os
+import select
+import struct
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing import shared_memory
+
+# configured, program mode, ready, GO count, heartbeat, telegrams the child dropped because the ring to the plugin
+# was full
+STATUS = struct.Struct('<BBBxHxxII')
+RING_HEADER = struct.Struct('<II')
+RECORD_HEADER = struct.Struct('<BBH')
+RECORD_SIZE = 128
+MAX_PAYLOAD = RECORD_SIZE - RECORD_HEADER.size
+
+# child to plugin
+TELEGRAM = 1
+# plugin to child
+WRITE = 1
+READ = 2
+PROGRAM_MODE = 3
+START = 4
+STOP = 5
+
+# seconds without heartbeat after which the child counts as hanging
+HEARTBEAT_TIMEOUT = 30
+
+# seconds a child has to run before its end no longer adds to the restart delay
+HEALTHY_RUN = 300
+
+
+class Ring:
+    """
+    Single producer, single consumer ring of records at offset in buf.
+    head and tail count records and wrap at 2**32.
+    """
+
+    def __init__(self, buf, offset, capacity):
+        self.buf = buf
+        self.offset = offset
+        self.capacity = capacity
+        self.records = offset + RING_HEADER.size
+        self.lock = threading.Lock()
+        self.dropped = 0
+
+    @staticmethod
+    def size(capacity):
+        return RING_HEADER.size + capacity * RECORD_SIZE
+
+    def reset(self):
+        RING_HEADER.pack_into(self.buf, self.offset, 0, 0)
+
+    def push(self, kind, goNr, payload=b''):
+        """
+        :return: True if the ring was empty before, the consumer has to be woken up then
+        """
+        if len(payload) > MAX_PAYLOAD:
+            raise ValueError("payload of {} bytes does not fit into a record".format(len(payload)))
+        with self.lock:
+            head, tail = RING_HEADER.unpack_from(self.buf, self.offset)
+            count = (tail - head) & 0xffffffff
+            if count >= self.capacity:
+                self.dropped += 1
+                return False
+            position = self.records + (tail % self.capacity) * RECORD_SIZE
+            RECORD_HEADER.pack_into(self.buf, position, kind, len(payload), goNr)
+            self.buf[position + RECORD_HEADER.size:position + RECORD_HEADER.size + len(payload)] = payload
+            # the tail is published after the record is complete
+            struct.pack_into('<I', self.buf, self.offset + 4, (tail + 1) & 0xffffffff)
+            return count == 0
+
+    def pop(self):
+        """
+        :return: (kind, goNr, payload) or None if the ring is empty
+        """
+        head, tail = RING_HEADER.unpack_from(self.buf, self.offset)
+        if head == tail:
+            return None
+        position = self.records + (head % self.capacity) * RECORD_SIZE
+        kind, length, goNr = RECORD_HEADER.unpack_from(self.buf, position)
+        payload = bytes(self.buf[position + RECORD_HEADER.size:position + RECORD_HEADER.size + length])
+        struct.pack_into('<I', self.buf, self.offset, (head + 1) & 0xffffffff)
+        return kind, goNr, payload
+
+    def depth(self):
+        head, tail = RING_HEADER.unpack_from(self.buf, self.offset)
+        return (tail - head) & 0xffffffff
+
+
+class Segment:
+    """
+    Status block and both rings in one shared memory segment
+    """
+
+    def __init__(self, capacity, name=None):
+        size = STATUS.size + 2 * Ring.size(capacity)
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=size)
+            self.memory.buf[:size] = bytes(size)
+        else:
+            self.memory = attach(name)
+        self.buf = self.memory.buf
+        self.toPlugin = Ring(self.buf, STATUS.size, capacity)
+        self.toChild = Ring(self.buf, STATUS.size + Ring.size(capacity), capacity)
+
+    def status(self):
+        configured, programMode, ready, goCount, heartbeat, dropped = STATUS.unpack_from(self.buf, 0)
+        return {'configured': bool(configured), 'programMode': bool(programMode), 'ready': bool(ready),
+                'goCount': goCount, 'heartbeat': heartbeat, 'dropped': dropped}
+
+    def setStatus(self, configured, programMode, ready, goCount, heartbeat, dropped):
+        STATUS.pack_into(self.buf, 0, int(configured), int(programMode), int(ready), goCount,
+                         heartbeat & 0xffffffff, dropped & 0xffffffff)
+
+    def close(self, unlink=False):
+        """
+        :return: False if another thread still used the buffer, the memory is released with its last use then
+        """
+        # the ring locks keep commands from writing into the buffer while it is released
+        with self.toPlugin.lock, self.toChild.lock:
+            try:
+                self.memory.close()
+                released = True
+            except BufferError:
+                released = False
+            else:
+                self.toPlugin.buf = self.toChild.buf = self.buf = None
+        if unlink:
+            self.memory.unlink()
+        return released
+
+
+def attach(name):
+    # the segment belongs to the plugin, the child must not remove it when it exits
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        memory = shared_memory.SharedMemory(name=name)
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(memory._name, 'shared_memory')
+        return memory
+
+
+def ring(fd):
+    try:
+        os.write(fd, b'\x01')
+    except (BlockingIOError, BrokenPipeError):
+        # a pending bell wakes the other side as well, a missing reader is noticed by the supervision
+        pass
+
+
+def drain(fd):
+    """
+    :return: False if the other side closed the pipe
+    """
+    try:
+        return bool(os.read(fd, 4096))
+    except BlockingIOError:
+        return True
+
+
+class GroupObject:
+    """
+    Proxy of a GO of the child, the value is the last one received or written
+    """
+
+    def __init__(self, stack, goNr):
+        self.stack = stack
+        self.goNr = goNr
+        self._value = b''
+        self._callBack = None
+
+    def asap(self):
+        return self.goNr
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._value = bytes(value)
+        self.stack.command(WRITE, self.goNr, self._value)
+
+    def callBack(self, callBack):
+        self._callBack = callBack
+
+    def requestObjectRead(self):
+        self.stack.command(READ, self.goNr)
+
+
+class ProcessStack:
+    """
+    Functions of the knx module for the plugin, carried out by a supervised child process
+    """
+
+    def __init__(self, capacity=1024, name='knx_ets'):
+        self.logger = logging.getLogger(__name__)
+        self.capacity = capacity
+        self.name = name
+        self.args = []
+        self.flashFilePath = ''
+        self.groupObjects = {}
+        self.segment = None
+        self.process = None
+        self.bellToChild = None
+        self.bellFromChild = None
+        self.thread = None
+        self.running = False
+        self.stopped = threading.Event()
+        self.started = False
+        self.lastHeartbeat = (None, 0)
+
+        # consecutive ends of children that did not run HEALTHY_RUN seconds, the exponent of the restart delay
+        self.failures = 0
+        self.spawnedAt = None
+
+        self.received = 0
+        self.restarts = 0
+        # telegrams dropped by the children before the current one
+        self.droppedBefore = 0
+
+    def Prepare(self, args):
+        self.args = list(args)
+
+    def FlashFilePath(self, path=None):
+        if path is not None:
+            self.flashFilePath = path
+        return self.flashFilePath
+
+    def ReadMemory(self):
+        self.spawn()
+
+    def Configured(self):
+        return self.segment is not None and self.segment.status()['configured']
+
+    def ProgramMode(self, on=None):
+        if on is not None:
+            self.command(PROGRAM_MODE, int(bool(on)))
+            return bool(on)
+        return self.segment is not None and self.segment.status()['programMode']
+
+    def GetGroupObject(self, goNr):
+        if self.segment is None or goNr < 1 or goNr > self.segment.status()['goCount']:
+            return None
+        groupObject = self.groupObjects.get(goNr)
+        if groupObject is None:
+            groupObject = self.groupObjects[goNr] = GroupObject(self, goNr)
+        return groupObject
+
+    def Start(self):
+        self.started = True
+        self.command(START, 0)
+        self.running = True
+        self.thread = threading.Thread(target=self.work, name=self.name + ".stack", daemon=True)
+        self.thread.start()
+
+    def Stop(self):
+        self.running = False
+        self.stopped.set()
+        if self.thread is not None:
+            # the thread reads from the segment until it ends, only then the segment can be released
+            self.thread.join(5)
+            if self.thread.is_alive():
+                self.logger.warning("{}: stack thread still busy with a callback at the stop".format(self.name))
+            self.thread = None
+        self.terminate()
+
+    def command(self, kind, goNr, payload=b''):
+        segment = self.segment
+        if segment is None:
+            return
+        try:
+            if segment.toChild.push(kind, goNr, payload):
+                ring(self.bellToChild)
+        except (TypeError, ValueError) as e:
+            # the segment is released while the child restarts
+            self.logger.warning("{}: command {} for GO {} not passed to the stack: {}".format(self.name, kind, goNr, e))
+
+    def spawn(self):
+        self.segment = Segment(self.capacity)
+        toChildRead, self.bellToChild = os.pipe()
+        self.bellFromChild, fromChildWrite = os.pipe()
+        os.set_blocking(self.bellToChild, False)
+        os.set_blocking(self.bellFromChild, False)
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), self.segment.memory.name, str(self.capacity),
+             str(toChildRead), str(fromChildWrite), self.flashFilePath] + self.args[1:],
+            pass_fds=(toChildRead, fromChildWrite), close_fds=True)
+        os.close(toChildRead)
+        os.close(fromChildWrite)
+        self.logger.info("{}: stack process {} started".format(self.name, self.process.pid))
+
+        # the child reads the flash file before the GOs can be resolved
+        deadline = time.monotonic() + 30
+        while not self.segment.status()['ready']:
+            if self.process.poll() is not None or time.monotonic() > deadline:
+                self.logger.error("{}: stack process did not get ready".format(self.name))
+                return False
+            time.sleep(0.01)
+        self.lastHeartbeat = (None, time.monotonic())
+        self.spawnedAt = time.monotonic()
+        return True
+
+    def terminate(self):
+        if self.process is not None:
+            self.command(STOP, 0)
+            try:
+                self.process.wait(5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+            self.process = None
+        for fd in (self.bellToChild, self.bellFromChild):
+            if fd is not None:
+                os.close(fd)
+        self.bellToChild = self.bellFromChild = None
+        if self.segment is not None:
+            self.droppedBefore += self.segment.status()['dropped']
+            if not self.segment.close(unlink=True):
+                self.logger.warning("{}: shared memory still in use, it is released later".format(self.name))
+            self.segment = None
+
+    def hanging(self):
+        heartbeat = self.segment.status()['heartbeat']
+        now = time.monotonic()
+        if heartbeat != self.lastHeartbeat[0]:
+            self.lastHeartbeat = (heartbeat, now)
+            return False
+        return now - self.lastHeartbeat[1] > HEARTBEAT_TIMEOUT
+
+    def restart(self):
+        self.restarts += 1
+        if self.spawnedAt is not None and time.monotonic() - self.spawnedAt >= HEALTHY_RUN:
+            self.failures = 0
+        self.spawnedAt = None
+        self.failures += 1
+        delay = min(30, 2 ** min(self.failures, 5))
+        self.logger.error("{}: stack process ended, restart {} in {}s".format(self.name, self.restarts, delay))
+        self.terminate()
+        if self.stopped.wait(delay):
+            return
+        if self.spawn():
+            self.command(START, 0)
+
+    def work(self):
+        while self.running:
+            if self.process is None or self.process.poll() is not None or self.hanging():
+                self.restart()
+                continue
+
+            segment = self.segment
+            record = segment.toPlugin.pop()
+            while record is not None:
+                kind, goNr, payload = record
+                groupObject = self.groupObjects.get(goNr)
+                if kind == TELEGRAM and groupObject is not None:
+                    groupObject._value = payload
+                    self.received += 1
+                    if groupObject._callBack is not None:
+                        try:
+                            groupObject._callBack(groupObject)
+                        except Exception as e:
+                            self.logger.exception("{}: callback of GO {} failed: {}".format(self.name, goNr, e))
+                # after a stop the segment may be released once the callback returns
+                record = segment.toPlugin.pop() if self.running else None
+
+            readable = select.select([self.bellFromChild], [], [], 0.5)[0]
+            if readable:
+                drain(self.bellFromChild)
+
+    def statistics(self):
+        segment = self.segment
+        return {
+            'pid': self.process.pid if self.process is not None else None,
+            'restarts': self.restarts,
+            'consecutive failures': self.failures,
+            'received': self.received,
+            'to plugin depth': segment.toPlugin.depth() if segment is not None else None,
+            'to stack depth': segment.toChild.depth() if segment is not None else None,
+            'to stack dropped': segment.toChild.dropped if segment is not None else None,
+            'to plugin dropped': self.droppedBefore + (segment.status()['dropped'] if segment is not None else 0),
+        }
+
+
+def childMain(argv):
+    name, capacity, bellFromPlugin, bellToPlugin, flashFilePath = argv[1:6]
+    import knx
+
+    segment = Segment(int(capacity), name)
+    bellFromPlugin = int(bellFromPlugin)
+    bellToPlugin = int(bellToPlugin)
+    os.set_blocking(bellToPlugin, False)
+
+    knx.Prepare([sys.executable, argv[0]] + argv[6:])
+    knx.FlashFilePath(flashFilePath)
+    knx.ReadMemory()
+    configured = knx.Configured()
+    groupObjects = {}
+    if configured:
+        goNr = 1
+        while True:
+            groupObject = knx.GetGroupObject(goNr)
+            if groupObject is None:
+                break
+            groupObjects[goNr] = groupObject
+            goNr += 1
+    heartbeat = 0
+    segment.setStatus(configured, knx.ProgramMode(), True, len(groupObjects), heartbeat, 0)
+
+    def updated(groupObject):
+        if segment.toPlugin.push(TELEGRAM, groupObject.asap(), bytes(groupObject.value)):
+            ring(bellToPlugin)
+
+    started = False
+    while True:
+        readable = select.select([bellFromPlugin], [], [], 1)[0]
+        if readable and not drain(bellFromPlugin):
+            # the plugin is gone
+            break
+        command = segment.toChild.pop()
+        stop = False
+        while command is not None:
+            kind, goNr, payload = command
+            if kind == WRITE and goNr in groupObjects:
+                groupObjects[goNr].value = payload
+            elif kind == READ and goNr in groupObjects:
+                groupObjects[goNr].requestObjectRead()
+            elif kind == PROGRAM_MODE:
+                knx.ProgramMode(bool(goNr))
+            elif kind == START and not started:
+                for groupObject in groupObjects.values():
+                    groupObject.callBack(updated)
+                knx.Start()
+                started = True
+            elif kind == STOP:
+                stop = True
+                break
+            command = segment.toChild.pop()
+        if stop:
+            break
+        heartbeat += 1
+        # the drops of the stack thread are published with the heartbeat
+        segment.setStatus(configured, knx.ProgramMode(), True, len(groupObjects), heartbeat,
+                          segment.toPlugin.dropped)
+
+    if started:
+        knx.Stop()
+    segment.close()
+
+
+if __name__ == '__main__':
+    childMain(sys.argv)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG.
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG.  If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+"""
+Distribution of the items over the instances with shards
+"""
+"""
+Clock telegrams at the boundaries of send_time
+"""
+
+import datetime
+import types
+import unittest
+
+from support import plugin
+
+dpts = plugin.dpts
+ClockSender = plugin.clock.ClockSender
+
+WINTER = datetime.timezone(datetime.timedelta(hours=1))
+SUMMER = datetime.timezone(datetime.timedelta(hours=2))
+
+
+class ClockSenderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sent = []
+        self.sender = ClockSender(lambda binding, rawValue: self.sent.append((binding.item, rawValue)), 60)
+        self.sender.add('10', types.SimpleNamespace(item='time'))
+        self.sender.add('19', types.SimpleNamespace(item='datetime'))
+
+    def sentTimes(self):
+        times = {}
+        for name, rawValue in self.sent:
+            if name == 'time':
+                times[name] = dpts.decode['10'](rawValue)
+            else:
+                times[name] = dpts.decode['19'](rawValue[dpts.payloadStart['19']:]).time()
+        self.sent = []
+        return times
+
+    def test_boundary(self):
+        nextTime = self.sender.send(datetime.datetime(2026, 3, 28, 14, 0, 30, tzinfo=WINTER))
+        self.assertEqual(nextTime, datetime.datetime(2026, 3, 28, 14, 1, tzinfo=WINTER))
+        self.sentTimes()
+        self.sender.send(nextTime)
+        self.assertEqual(self.sentTimes(), {'time': datetime.time(14, 1), 'datetime': datetime.time(14, 1)})
+        self.assertEqual(self.sender.late, 0)
+
+    def test_daylight_saving_time_begins(self):
+        # Europe/Berlin 2026-03-29: 02:00 CET is 03:00 CEST
+        nextTime = self.sender.send(datetime.datetime(2026, 3, 29, 1, 59, 10, tzinfo=WINTER))
+        self.sentTimes()
+        now = nextTime.astimezone(SUMMER)
+        self.assertEqual(now, datetime.datetime(2026, 3, 29, 3, 0, tzinfo=SUMMER))
+        self.sender.send(now)
+        self.assertEqual(self.sentTimes(), {'time': datetime.time(3, 0), 'datetime': datetime.time(3, 0)})
+
+    def test_daylight_saving_time_ends(self):
+        # Europe/Berlin 2026-10-25: 03:00 CEST is 02:00 CET
+        nextTime = self.sender.send(datetime.datetime(2026, 10, 25, 2, 59, 10, tzinfo=SUMMER))
+        self.sentTimes()
+        now = nextTime.astimezone(WINTER)
+        self.assertEqual(now, datetime.datetime(2026, 10, 25, 2, 0, tzinfo=WINTER))
+        self.sender.send(now)
+        self.assertEqual(self.sentTimes(), {'time': datetime.time(2, 0), 'datetime': datetime.time(2, 0)})
+
+
+if __name__ == '__main__':
+    unittest.main()
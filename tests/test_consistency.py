@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG.
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG.  If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+"""
+Item and GO agree after a change of the item raced a received telegram
+"""
+
+import time
+import unittest
+
+from support import Harness, Item, plugin
+
+dpts = plugin.dpts
+
+
+class InterleavedItem(Item):
+    """
+    Item that runs hook just before the plugin sets it the first time, like a logic changing it in between
+    """
+
+    def __init__(self, path, conf):
+        super().__init__(path, conf)
+        self.hook = None
+
+    def __call__(self, value=None, caller='Logic', source=None, dest=None):
+        if value is not None and caller == 'knx_ets' and self.hook is not None:
+            hook, self.hook = self.hook, None
+            hook()
+        return super().__call__(value, caller, source, dest)
+
+
+def payload(value):
+    return bytes(dpts.encode['9'](value))[dpts.payloadStart['9']:]
+
+
+class ConsistencyTest(unittest.TestCase):
+
+    def start(self, workers):
+        item = InterleavedItem('room.value', {'knx_dpt': '9', 'knx_send': ['1/1/1'], 'knx_listen': ['1/1/2']})
+        harness = Harness([item], {'dispatch_workers': workers})
+        self.addCleanup(harness.close)
+        self.assertTrue(harness.start())
+        return harness, item
+
+    def settled(self, item, expected):
+        # the dispatcher sets the item in a thread of its own
+        deadline = time.monotonic() + 5
+        while item() != expected and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.05)
+
+    def assertConsistent(self, harness, item, expected):
+        knxEts = harness.plugin
+        self.settled(item, expected)
+        self.assertEqual(item(), expected)
+        goNr = knxEts.bindings[0].mainGoNr
+        # the GO holds the encoder output when sent and the payload alone when received
+        self.assertEqual(knxEts.knx.GetGroupObject(goNr).value[-2:], payload(expected))
+
+    def test_item_changed_while_receiving(self):
+        for workers in (0, 1):
+            with self.subTest(dispatch_workers=workers):
+                harness, item = self.start(workers)
+
+                def change():
+                    item(42.0)
+                    harness.plugin.update_item(item, caller='Logic')
+
+                item.hook = change
+                harness.plugin.knx.receive(harness.plugin.bindings[0].mainGoNr, payload(7.0))
+                self.assertConsistent(harness, item, 42.0)
+
+    def test_telegram_received_while_receiving(self):
+        for workers in (0, 1):
+            with self.subTest(dispatch_workers=workers):
+                harness, item = self.start(workers)
+                goNr = harness.plugin.bindings[0].mainGoNr
+                item.hook = lambda: harness.plugin.knx.receive(goNr, payload(42.0))
+                harness.plugin.knx.receive(goNr, payload(7.0))
+                self.assertConsistent(harness, item, 42.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
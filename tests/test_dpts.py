@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG.
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG.  If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+"""
+The table decoders against the scalar decoders over every possible payload, the *_into encoders against the
+scalar encoders over the boundaries of every DPT.
+
+Run from the plugin directory with  python3 -m unittest discover tests
+"""
+
+import datetime
+import importlib.util
+import os
+import unittest
+
+# dpts.py needs nothing of SmartHomeNG, loading it alone spares the plugin package and its imports
+_spec = importlib.util.spec_from_file_location(
+    'dpts', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'dpts.py'))
+dpts = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(dpts)
+
+
+def payloads(size):
+    if size == 1:
+        return [bytes((i,)) for i in range(0x100)]
+    return [bytes((i >> 8, i & 0xff)) for i in range(0x10000)]
+
+
+class TableDecodeTest(unittest.TestCase):
+
+    def test_covers_all_small_dpts(self):
+        for dpt in dpts.tableDecode:
+            self.assertIn(dpts.sizes[dpt], (1, 2), dpt)
+
+    def test_equal_to_scalar_decoder(self):
+        for dpt, tableDecoder in dpts.tableDecode.items():
+            scalar = dpts.decode[dpt]
+            with self.subTest(dpt=dpt):
+                for payload in payloads(dpts.sizes[dpt]):
+                    expected = scalar(payload)
+                    actual = tableDecoder.decode(payload)
+                    # repr tells True from 1 and -0.0 from 0.0, so this is a bit-exact comparison
+                    if type(actual) is not type(expected) or repr(actual) != repr(expected):
+                        self.fail("DPT {} payload {}: table {!r}, scalar {!r}".format(
+                            dpt, payload.hex(), actual, expected))
+
+    def test_built_on_first_use(self):
+        tableDecoder = dpts.TableDecoder(dpts.de9, 2)
+        self.assertEqual(tableDecoder.table, [])
+        self.assertEqual(tableDecoder.decode(b'\x0c\x1a'), dpts.de9(b'\x0c\x1a'))
+        self.assertEqual(len(tableDecoder.table), 0x10000)
+
+    def test_aliases_share_table(self):
+        self.assertIs(dpts.tableDecode['5001'], dpts.tableDecode['5.001'])
+        self.assertIs(dpts.tableDecode['17001'], dpts.tableDecode['17.001'])
+        self.assertIs(dpts.tableDecode['4002'], dpts.tableDecode['4.002'])
+
+    def test_wrong_payload_size(self):
+        self.assertIsNone(dpts.tableDecode['9'].decode(b'\x0c'))
+        self.assertIsNone(dpts.tableDecode['5'].decode(b'\x01\x02'))
+
+
+_dateTimes = (datetime.datetime(2026, 3, 29, 0, 0, 0), datetime.datetime(2026, 10, 25, 23, 59, 59),
+              datetime.datetime(2026, 3, 29, 3, 4, 5, tzinfo=datetime.timezone(datetime.timedelta(hours=2))),
+              datetime.date(2026, 1, 1))
+_strings = ('', 'text', 'x' * 14, 'longer than 14 characters', '\xe4\xf6\xfc\u20ac')
+
+# values at and beyond the boundaries of every DPT, the ones an encoder rejects have to fail in both variants
+VALUES = {
+    '1': (False, True, 0, 1, 2),
+    '2': ((0, 0), (0, 1), (1, 0), (1, 1), (2, 3)),
+    '3': ((0, 0), (1, 7), (0, 5), (1, 8)),
+    '4002': ('a', '\xff', 5, '\u20ac', ''),
+    '5': (-1, 0, 1, 12.7, 254, 255, 256),
+    '5001': (-1, 0, 0.4, 50, 99.9, 100, 101),
+    '6': (-129, -128, -1, 0, 3.9, 127, 128),
+    '7': (-1, 0, 1, 65535, 65536),
+    '8': (-32769, -32768, -1.5, 0, 32767, 32768),
+    '9': (-671088.64, -273.15, -0.01, 0, 0.01, 21.5, 670760.96, 1e7, 1e12),
+    '10': _dateTimes + (datetime.time(12, 0),),
+    '11': (datetime.date(2000, 1, 1), datetime.date(2026, 12, 31), datetime.date(2255, 12, 31),
+           datetime.date(2256, 1, 1), datetime.date(1999, 12, 31)),
+    '12': (-1, 0, 1, 4294967295, 4294967296),
+    '13': (-2147483649, -2147483648, 0, 2147483647, 2147483648),
+    '14': (0.0, -0.0, 1.5, -1e-45, 3.4e38, -3.4e38, 3.5e38, float('inf'), float('nan')),
+    '16000': _strings,
+    '16001': _strings,
+    '17': (-1, 0, 1, 63, 64),
+    '17001': (0, 1, 2, 64, 65),
+    '19': _dateTimes,
+    '20': (-1, 0, 255, 256),
+    '232': ((0, 0, 0), (255, 128, 1), (256, 0, 0)),
+}
+
+
+def values(encoderInto):
+    # aliases share the encoder, its name tells the DPT of VALUES
+    return VALUES[encoderInto.__name__[len('en'):-len('_into')]]
+
+
+class EncodeIntoTest(unittest.TestCase):
+
+    def test_covers_all_fixed_size_dpts(self):
+        self.assertEqual(set(dpts.encodeInto), set(dpts.encode) - {'24'})
+        for encoderInto in dpts.encodeInto.values():
+            self.assertTrue(values(encoderInto))
+
+    def test_equal_to_scalar_encoder(self):
+        for dpt, encoderInto in dpts.encodeInto.items():
+            scalar = dpts.encode[dpt]
+            for value in values(encoderInto):
+                with self.subTest(dpt=dpt, value=value):
+                    # a buffer of exactly the encoded length, filled with garbage the encoder has to overwrite
+                    buffer = bytearray(b'\xa5' * dpts.encodedSizes[dpt])
+                    try:
+                        expected = bytes(scalar(value))
+                    except Exception as e:
+                        with self.assertRaises(type(e)):
+                            encoderInto(value, buffer)
+                        continue
+                    self.assertEqual(encoderInto(value, buffer), len(expected))
+                    self.assertEqual(bytes(buffer), expected)
+
+    def test_scene_number(self):
+        # scenes are numbered 1 to 64 and sent as 0 to 63
+        buffer = bytearray(2)
+        for scene, payload in ((1, b'\x00\x00'), (64, b'\x00\x3f')):
+            self.assertEqual(bytes(dpts.en17001(scene)), payload)
+            dpts.en17001_into(scene, buffer)
+            self.assertEqual(bytes(buffer), payload)
+            self.assertEqual(dpts.de17001(payload[1:]), scene)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG.
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG.  If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+"""
+The bulk functions of dptsarray against the scalar functions of dpts.
+
+Run from the plugin directory with  python3 -m unittest discover tests
+"""
+
+import importlib
+import os
+import random
+import sys
+import types
+import unittest
+from unittest import mock
+
+# the package __init__ needs SmartHomeNG, dpts and dptsarray need nothing of it. An empty package over the plugin
+# directory lets dptsarray import dpts relatively without running __init__
+_package = types.ModuleType('knx_ets_dpts')
+_package.__path__ = [os.path.dirname(os.path.dirname(os.path.abspath(__file__)))]
+sys.modules.setdefault(_package.__name__, _package)
+dptsarray = importlib.import_module(_package.__name__ + '.dptsarray')
+dpts = dptsarray.dpts
+
+# the same samples on every run
+_random = random.Random(1)
+
+ENCODABLE = [dpt for dpt in dptsarray.payloadSizes if dpt not in ('17001', '17.001')]
+
+
+def payloads(dpt, samples=2000):
+    """
+    All payloads of a 1 byte DPT, random ones of the wider DPTs
+    """
+    size = dptsarray.payloadSizes[dpt]
+    if size == 1:
+        return [bytes((i,)) for i in range(0x100)]
+    return [bytes(_random.getrandbits(8) for i in range(size)) for j in range(samples)]
+
+
+def values(dpt, samples=2000):
+    """
+    Values over the range of the DPT and beyond it, including the boundaries
+    """
+    low, high = {
+        '1': (0, 1), '5': (0, 255), '5001': (0, 100), '5.001': (0, 100), '6': (-128, 127), '7': (0, 65535),
+        '8': (-32768, 32767), '9': (-671088.64, 670760.96), '12': (0, 4294967295), '13': (-2147483648, 2147483647),
+        '14': (-3.4e38, 3.4e38), '17': (0, 63), '20': (0, 255),
+    }[dpt]
+    # the encoders of 7, 9 and 14 reject values out of range instead of clipping them
+    margin = 0 if dpt in ('7', '9', '14') else (high - low) / 10 + 1
+    result = [low, high, 0, low - margin, high + margin]
+    result += [_random.uniform(low - margin, high + margin) for i in range(samples)]
+    if dpt == '9':
+        # beyond its range en9 overflows the exponent into the sign instead of failing
+        result += [1e7, -1e9]
+    if dpt not in ('9', '14'):
+        result += [_random.randint(int(low - margin), int(high + margin)) for i in range(samples)]
+    return result
+
+
+def same(actual, expected):
+    # repr tells True from 1, -0.0 from 0.0 and compares NaN
+    return type(actual) is type(expected) and repr(actual) == repr(expected)
+
+
+class DecodeArrayTest(unittest.TestCase):
+
+    def check(self, dpt, samples):
+        actual = dptsarray.decodeArray(dpt, b''.join(samples))
+        if dptsarray.available():
+            actual = actual.tolist()
+        self.assertEqual(len(actual), len(samples))
+        for payload, value in zip(samples, actual):
+            expected = dpts.decode[dpt](payload)
+            if not same(value, expected):
+                self.fail("DPT {} payload {}: array {!r}, scalar {!r}".format(dpt, payload.hex(), value, expected))
+
+    @unittest.skipUnless(dptsarray.available(), "needs NumPy")
+    def test_equal_to_scalar_decoder(self):
+        for dpt in dptsarray.payloadSizes:
+            with self.subTest(dpt=dpt):
+                self.check(dpt, payloads(dpt))
+
+    @unittest.skipUnless(dptsarray.available(), "needs NumPy")
+    def test_rows(self):
+        samples = payloads('9')
+        rows = dptsarray.np.frombuffer(b''.join(samples), dtype=dptsarray.np.uint8).reshape(-1, 2)
+        self.assertEqual(dptsarray.decodeArray('9', rows).tolist(),
+                         dptsarray.decodeArray('9', b''.join(samples)).tolist())
+
+    def test_fallback_without_numpy(self):
+        with mock.patch.object(dptsarray, 'np', None):
+            for dpt in dptsarray.payloadSizes:
+                with self.subTest(dpt=dpt):
+                    self.check(dpt, payloads(dpt, 200))
+
+    def test_size_mismatch(self):
+        for numpy in ((dptsarray.np, None) if dptsarray.available() else (None,)):
+            with self.subTest(numpy=numpy is not None), mock.patch.object(dptsarray, 'np', numpy):
+                with self.assertRaises(ValueError):
+                    dptsarray.decodeArray('9', b'\x0c\x1a\x0c')
+                with self.assertRaises(ValueError):
+                    dptsarray.decodeArray('12', bytes(6))
+
+    def test_unsupported_dpt(self):
+        with self.assertRaises(ValueError):
+            dptsarray.decodeArray('16', bytes(14))
+
+
+class EncodeArrayTest(unittest.TestCase):
+
+    def check(self, dpt, samples):
+        expected = b''.join(bytes(dpts.encode[dpt](value)) for value in samples)
+        actual = dptsarray.encodeArray(dpt, samples)
+        if actual != expected:
+            size = len(expected) // len(samples)
+            for i, value in enumerate(samples):
+                if actual[i * size:(i + 1) * size] != expected[i * size:(i + 1) * size]:
+                    self.fail("DPT {} value {!r}: array {}, scalar {}".format(
+                        dpt, value, actual[i * size:(i + 1) * size].hex(), expected[i * size:(i + 1) * size].hex()))
+            self.fail("DPT {}: array {} bytes, scalar {} bytes".format(dpt, len(actual), len(expected)))
+
+    @unittest.skipUnless(dptsarray.available(), "needs NumPy")
+    def test_equal_to_scalar_encoder(self):
+        for dpt in ENCODABLE:
+            with self.subTest(dpt=dpt):
+                self.check(dpt, values(dpt))
+
+    def test_fallback_without_numpy(self):
+        with mock.patch.object(dptsarray, 'np', None):
+            for dpt in ENCODABLE:
+                with self.subTest(dpt=dpt):
+                    self.check(dpt, values(dpt, 200))
+
+    @unittest.skipUnless(dptsarray.available(), "needs NumPy")
+    def test_out_of_range_fails_like_scalar(self):
+        for dpt, value in (('7', 65536), ('7', -1), ('9', 1e12), ('14', 3.5e38)):
+            with self.subTest(dpt=dpt, value=value):
+                with self.assertRaises(Exception) as scalar:
+                    dpts.encode[dpt](value)
+                with self.assertRaises(type(scalar.exception)):
+                    dptsarray.encodeArray(dpt, [0, value])
+
+    def test_unsupported_dpt(self):
+        with self.assertRaises(ValueError):
+            dptsarray.encodeArray('17001', [1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG.
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG.  If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+"""
+GO numbers of removed items given to new items
+"""
+
+import os
+import time
+import unittest
+
+from support import Harness, Item
+
+
+def item(name):
+    return Item('room.' + name, {'knx_dpt': '1', 'knx_send': ['1/1/1']})
+
+
+class ReuseTest(unittest.TestCase):
+
+    def reuse(self, flash):
+        """
+        Start with the number of a removed item reused for a new one
+
+        :param flash: None without a flash file, else whether it was written before the new knxprod version
+        :return: (harness, binding of the new item, the reused number)
+        """
+        first = Harness([item('removed'), item('kept')])
+        self.addCleanup(first.close)
+        self.assertTrue(first.start())
+        removedGoNr = first.plugin.bindingsByItem[first.items[0]].mainGoNr
+
+        second = Harness([item('kept'), item('added')], knxprod=first.plugin.knxprodPath)
+        self.addCleanup(second.close)
+        # the new version is generated, maybe downloaded with ETS, and then the plugin starts with it
+        second.plugin.generateKnxProd()
+        if flash is not None:
+            with open(second.plugin.flashFilePath, 'wb') as flashFile:
+                flashFile.write(bytes(16))
+            written = 0 if flash else time.time() + 10
+            os.utime(second.plugin.flashFilePath, (written, written))
+        self.assertTrue(second.start())
+        return second, second.plugin.bindingsByItem[second.items[1]], removedGoNr
+
+    def test_unbound_until_downloaded(self):
+        with self.assertLogs(level='WARNING') as logs:
+            harness, binding, goNr = self.reuse(flash=True)
+        self.assertEqual(harness.plugin.goChanges['reused'], [(goNr, binding.identifiers[0])])
+        self.assertEqual(harness.plugin.unboundGos, {goNr})
+        self.assertIsNone(harness.plugin.goTable[goNr])
+        self.assertEqual(binding.groupObjects, [])
+        self.assertTrue(any('stay unbound' in message for message in logs.output))
+
+    def test_bound_after_download(self):
+        harness, binding, goNr = self.reuse(flash=False)
+        self.assertFalse(harness.plugin.unboundGos)
+        self.assertIs(harness.plugin.goTable[goNr].binding, binding)
+        self.assertEqual(len(binding.groupObjects), 1)
+
+    def test_bound_without_flash(self):
+        harness, binding, goNr = self.reuse(flash=None)
+        self.assertFalse(harness.plugin.unboundGos)
+        self.assertEqual(len(binding.groupObjects), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
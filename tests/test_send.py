@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG.
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG.  If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+"""
+Sending item changes to the GOs
+"""
+
+import datetime
+import time
+import unittest
+
+from support import Harness, Item, plugin
+
+dpts = plugin.dpts
+
+
+class SendOnChangeOnlyTest(unittest.TestCase):
+
+    def start(self, dpt, parameters=None):
+        item = Item('room.value', {'knx_dpt': dpt, 'knx_send': ['1/1/1'], 'knx_listen': ['1/1/2'],
+                                   'knx_send_on_change_only': True})
+        harness = Harness([item], parameters)
+        self.addCleanup(harness.close)
+        self.assertTrue(harness.start())
+        return harness, item
+
+    def change(self, harness, item, value):
+        item(value)
+        harness.plugin.update_item(item, caller='Logic')
+
+    def test_received_value_is_not_sent_again(self):
+        values = (('1', True), ('5', 200), ('9', 21.5), ('11', datetime.date(2026, 3, 29)),
+                  ('12', 70000), ('14', 1.5), ('16', 'text'), ('19', datetime.datetime(2026, 3, 29, 3, 4, 5)),
+                  ('24', 'longer text'))
+        for dpt, value in values:
+            with self.subTest(dpt=dpt):
+                harness, item = self.start(dpt)
+                stack = harness.plugin.knx
+                goNr = harness.plugin.bindings[0].mainGoNr
+                # telegrams carry the payload without the leading byte of the encoder
+                payload = bytes(dpts.encode[dpt](value))[dpts.payloadStart[dpt]:]
+                stack.receive(goNr, payload)
+                self.assertEqual(item(), dpts.decode[dpt](payload))
+                writes = stack.writes
+                self.change(harness, item, item())
+                self.assertEqual(stack.writes, writes)
+
+    def test_sent_value_is_not_sent_again(self):
+        harness, item = self.start('9')
+        stack = harness.plugin.knx
+        self.change(harness, item, 21.5)
+        writes = stack.writes
+        self.change(harness, item, 21.5)
+        self.assertEqual(stack.writes, writes)
+        self.change(harness, item, 22.0)
+        self.assertEqual(stack.writes, writes + 1)
+
+
+class SendQueueDropTest(unittest.TestCase):
+
+    def test_dropped_value_is_sent_again(self):
+        items = [Item('room.value{}'.format(i), {'knx_dpt': '9', 'knx_send': ['1/1/{}'.format(i)],
+                                                 'knx_send_on_change_only': True}) for i in range(2)]
+        harness = Harness(items, {'send_rate': 1000, 'send_queue_size': 1})
+        self.addCleanup(harness.close)
+        self.assertTrue(harness.start())
+        knxEts = harness.plugin
+        sendScheduler = knxEts.sendScheduler
+        # nothing leaves the queue until the scheduler runs again
+        sendScheduler.stop()
+        for item in items:
+            item(21.5)
+            knxEts.update_item(item, caller='Logic')
+        self.assertEqual(sendScheduler.dropped, 1)
+
+        sendScheduler.start()
+        deadline = time.monotonic() + 5
+        while sendScheduler.depth() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        writes = knxEts.knx.writes
+        items[1](21.5)
+        knxEts.update_item(items[1], caller='Logic')
+        deadline = time.monotonic() + 5
+        while knxEts.knx.writes == writes and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(knxEts.knx.writes, writes + 1)
+        self.assertEqual(knxEts.knx.GetGroupObject(knxEts.bindingsByItem[items[1]].mainGoNr).value,
+                         bytes(dpts.encode['9'](21.5)))
+
+
+if __name__ == '__main__':
+    unittest.main()
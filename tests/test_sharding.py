@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG.
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG.  If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+"""
+Distribution of the items over the instances with shards
+"""
+
+import unittest
+
+from support import Harness, Item, plugin
+
+
+def boundItems(harness):
+    return sorted(str(binding.item) for binding in harness.plugin.bindings)
+
+
+class ShardingTest(unittest.TestCase):
+
+    def shard(self, items, instance, index):
+        harness = Harness(items, {'shards': 2, 'shard_index': index}, instance=instance)
+        self.addCleanup(harness.close)
+        return harness
+
+    def test_instance_attributes_bind_to_their_instance(self):
+        items = [Item('room.item{}'.format(i), {'knx_dpt@b': '1', 'knx_listen@b': ['1/1/1']}) for i in range(6)]
+        self.assertEqual(boundItems(self.shard(items, 'a', 0)), [])
+        self.assertEqual(boundItems(self.shard(items, 'b', 1)), [str(item) for item in items])
+
+    def test_shared_attributes_are_distributed(self):
+        items = [Item('room.item{}'.format(i), {'knx_dpt': '1', 'knx_listen': ['1/1/1']}) for i in range(20)]
+        first = boundItems(self.shard(items, 'a', 0))
+        second = boundItems(self.shard(items, 'b', 1))
+        self.assertTrue(first and second)
+        self.assertEqual(sorted(first + second), sorted(str(item) for item in items))
+
+    def test_knx_shard_of_other_instance_is_logged(self):
+        items = [Item('room.item', {'knx_dpt@b': '1', 'knx_shard@b': 0})]
+        with self.assertLogs(plugin.__name__, 'ERROR'):
+            harness = self.shard(items, 'b', 1)
+        self.assertEqual(boundItems(harness), [])
+
+    def test_shard_index_out_of_range(self):
+        with self.assertLogs(plugin.__name__, 'ERROR'):
+            harness = self.shard([], 'c', 2)
+        self.assertFalse(harness.plugin._init_complete)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG.
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG.  If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+"""
+The shared memory segment of stack: process, with both of its sides in this process.
+
+Run from the plugin directory with  python3 -m unittest discover tests
+"""
+
+import importlib.util
+import os
+import unittest
+
+# stackproc.py needs nothing but the standard library on the side of the plugin
+_spec = importlib.util.spec_from_file_location(
+    'stackproc', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'stackproc.py'))
+stackproc = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(stackproc)
+
+
+class SegmentTest(unittest.TestCase):
+
+    def test_child_drops_reach_the_plugin(self):
+        plugin = stackproc.Segment(4)
+        self.addCleanup(plugin.close, True)
+        # the child has Ring objects of its own over the same memory, and with them its own drop counters
+        child = stackproc.Ring(plugin.buf, plugin.toPlugin.offset, 4)
+        for goNr in range(1, 7):
+            child.push(stackproc.TELEGRAM, goNr, b'\x01')
+        self.assertEqual(child.dropped, 2)
+        self.assertEqual(plugin.toPlugin.dropped, 0)
+        plugin.setStatus(True, False, True, 6, 1, child.dropped)
+        self.assertEqual(plugin.status()['dropped'], 2)
+        self.assertEqual([plugin.toPlugin.pop()[1] for i in range(4)], [1, 2, 3, 4])
+
+    def test_drops_add_up_over_restarts(self):
+        stack = stackproc.ProcessStack(4)
+        for dropped in (3, 4):
+            stack.segment = stackproc.Segment(4)
+            stack.segment.setStatus(True, False, True, 0, 1, dropped)
+            self.assertEqual(stack.statistics()['to plugin dropped'], stack.droppedBefore + dropped)
+            stack.terminate()
+        self.assertEqual(stack.statistics()['to plugin dropped'], 7)
+
+    def test_close_while_the_buffer_is_used(self):
+        segment = stackproc.Segment(4)
+        # a view like the one a reading thread holds while it copies a record
+        view = segment.buf[0:4]
+        try:
+            with self.assertLogs(stackproc.__name__, level='WARNING'):
+                stack = stackproc.ProcessStack(4)
+                stack.segment = segment
+                stack.terminate()
+            self.assertIsNone(stack.segment)
+        finally:
+            view.release()
+        # released with its last use
+        self.assertTrue(segment.close())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG.
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG.  If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+"""
+A short run of tools/stress.py with the threading options of the plugin
+"""
+
+import unittest
+
+from support import Harness
+
+import stress
+
+CONFIGURATIONS = (
+    {},
+    {'dispatch_workers': 2},
+    {'dispatch_workers': 1, 'batch_window': 0.05, 'send_rate': 500},
+)
+
+
+class StressTest(unittest.TestCase):
+
+    def test_passes(self):
+        for parameters in CONFIGURATIONS:
+            with self.subTest(**parameters):
+                with Harness(stress.allDpts(), parameters) as harness:
+                    self.assertTrue(harness.start())
+                    stressTest = stress.StressTest(harness.plugin, seconds=1)
+                    self.assertTrue(stressTest.run(), stressTest.statistics())
+                    self.assertGreater(stressTest.injected, 0)
+                    self.assertGreater(sum(stressTest.changed), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
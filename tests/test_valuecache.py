@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG.
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG.  If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+"""
+Values of knx_cache items stored by the value cache
+"""
+
+import unittest
+
+from support import Harness, Item, plugin
+
+dpts = plugin.dpts
+
+
+class ValueCacheTest(unittest.TestCase):
+
+    def start(self, dpt):
+        item = Item('room.value', {'knx_dpt': dpt, 'knx_send': ['1/1/1'], 'knx_listen': ['1/1/2'],
+                                   'knx_cache': True})
+        harness = Harness([item], {'value_cache': True})
+        self.addCleanup(harness.close)
+        self.assertTrue(harness.start())
+        return harness, item
+
+    def cached(self, harness):
+        """
+        :return: dict GO number -> value of the cache file after a flush
+        """
+        knxEts = harness.plugin
+        knxEts.valueCache.flush()
+        valueCache = plugin.valuecache.ValueCache(knxEts.valueCachePath, dict(
+            (goNr, width) for goNr, (offset, width) in knxEts.valueCache.slots.items()))
+        try:
+            return valueCache.open()
+        finally:
+            valueCache.close()
+
+    def test_received_value_is_cached(self):
+        harness, item = self.start('9')
+        goNr = harness.plugin.bindings[0].mainGoNr
+        payload = bytes(dpts.encode['9'](21.5))[dpts.payloadStart['9']:]
+        harness.plugin.knx.receive(goNr, payload)
+        self.assertEqual(self.cached(harness), {goNr: payload})
+
+    def test_sent_value_is_cached_like_a_received_one(self):
+        for dpt, value in (('1', True), ('5', 200), ('9', 21.5), ('12', 70000)):
+            with self.subTest(dpt=dpt):
+                harness, item = self.start(dpt)
+                goNr = harness.plugin.bindings[0].mainGoNr
+                item(value)
+                harness.plugin.update_item(item, caller='Logic')
+                payload = self.cached(harness)[goNr]
+                self.assertEqual(payload, bytes(dpts.encode[dpt](value))[dpts.payloadStart[dpt]:])
+                self.assertEqual(dpts.decode[dpt](payload), value)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG.
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG.  If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+"""
+Benchmarks of the plugin without SmartHomeNG.
+
+    python3 plugins/knx_ets/tools/benchmark.py [benchmark ...]
+
+Runs the given benchmarks, all of them without arguments.
+"""
+
+import argparse
+import logging
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+from harness import Harness, Item, plugin
+
+dpts = plugin.dpts
+
+
+def nsPerCall(function, arguments, repeat=5):
+    """
+    Best of repeat runs over all arguments, in ns per call
+    """
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        for argument in arguments:
+            function(argument)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(arguments) * 1e9
+
+
+def benchmarkDecode():
+    """
+    Scalar decoders against the table decoders of decode_tables, on random payloads
+    """
+    print("{:<8} {:>12} {:>12} {:>8}".format('DPT', 'scalar ns', 'table ns', 'speedup'))
+    seen = set()
+    for dpt, tableDecoder in dpts.tableDecode.items():
+        if tableDecoder in seen:
+            continue
+        seen.add(tableDecoder)
+        size = dpts.sizes[dpt]
+        payloads = [bytes(random.getrandbits(8) for i in range(size)) for j in range(100000)]
+        tableDecoder.build()
+        scalar = nsPerCall(dpts.decode[dpt], payloads)
+        table = nsPerCall(tableDecoder.decode, payloads)
+        print("{:<8} {:>12.0f} {:>12.0f} {:>7.1f}x".format(dpt, scalar, table, scalar / table))
+
+
+SIZES = (1000, 10000, 50000)
+KNXPROD_RUNS = ('template', 'one item added', 'up to date')
+
+
+def syntheticItems(count, prefix='benchmark'):
+    dptCycle = ('1', '5.001', '9')
+    return [Item('{}.item{}'.format(prefix, i), {'knx_dpt': dptCycle[i % len(dptCycle)], 'knx_listen': ['1/1/1']})
+            for i in range(count)]
+
+
+def knxProdRuns(count, measure):
+    """
+    measure(generateKnxProd) for a knxprod generated from the template for count items, for count + 1 items
+    starting from that knxprod and once more with the knxprod up to date
+    """
+    items = syntheticItems(count)
+    with Harness(items) as first:
+        results = [measure(first.plugin.generateKnxProd)]
+        with Harness(items + syntheticItems(1, 'added'), knxprod=first.plugin.knxprodPath) as second:
+            results.append(measure(second.plugin.generateKnxProd))
+            results.append(measure(second.plugin.generateKnxProd))
+    return results
+
+
+def seconds(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def benchmarkKnxProd():
+    """
+    Time of generateKnxProd by number of items with one GO each
+    """
+    print(("{:<8}" + " {:>16}" * len(KNXPROD_RUNS)).format('items', *KNXPROD_RUNS))
+    for count in SIZES:
+        results = knxProdRuns(count, seconds)
+        print(("{:<8}" + " {:>14.0f}ms" * len(results)).format(count, *(result * 1000 for result in results)))
+
+
+def peakMemory(function):
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmarkMemory():
+    """
+    Peak memory allocated by generateKnxProd by number of items with one GO each
+    """
+    print(("{:<8}" + " {:>16}" * len(KNXPROD_RUNS)).format('GOs', *KNXPROD_RUNS))
+    for count in SIZES:
+        results = knxProdRuns(count, peakMemory)
+        print(("{:<8}" + " {:>14.1f}MB" * len(results)).format(count, *(result / 2 ** 20 for result in results)))
+
+
+class LookedUpSibling:
+    """
+    Sibling GO entry that looks up its GroupObject in the stack on every access, as updated() did before
+    the handles were resolved in run()
+    """
+    __slots__ = ('entry', 'stack')
+
+    def __init__(self, entry, stack):
+        self.entry = entry
+        self.stack = stack
+
+    @property
+    def lastRaw(self):
+        return self.entry.lastRaw
+
+    @lastRaw.setter
+    def lastRaw(self, rawValue):
+        self.entry.lastRaw = rawValue
+
+    @property
+    def groupObject(self):
+        return self.stack.GetGroupObject(self.entry.goNr)
+
+
+def fanout(telegrams):
+    """
+    The fan-out loop of updated(), mirroring each received value to the sibling GOs of its item
+    """
+    for entry, rawValue in telegrams:
+        entry.lastRaw = rawValue
+        for sibling in entry.fanout:
+            sibling.lastRaw = rawValue
+            sibling.groupObject.value = rawValue
+
+
+FANOUT_REPEATS = 21
+
+
+def benchmarkFanout():
+    """
+    The fan-out loop for items with a status GO, whose value updated() mirrors, with the GroupObject handles
+    resolved in run() and looked up per telegram. The variants take turns, so a slower phase of the machine
+    affects both.
+    """
+    items = [Item('benchmark.item{}'.format(i), {'knx_dpt': '9', 'knx_listen': ['1/1/1'], 'knx_status': ['1/1/2']})
+             for i in range(1000)]
+    with Harness(items) as harness:
+        harness.start()
+        knxEts = harness.plugin
+        entries = [entry for entry in knxEts.goTable if entry is not None]
+        lookedUpFanouts = dict((entry, tuple(LookedUpSibling(sibling, knxEts.knx) for sibling in entry.fanout))
+                               for entry in entries)
+        cachedFanouts = dict((entry, entry.fanout) for entry in entries)
+        telegrams = [(entry, bytes(dpts.encode['9'](random.uniform(-50, 50)))[1:])
+                     for entry in random.choices(entries, k=100000)]
+        variants = (('cached in run()', cachedFanouts), ('looked up per telegram', lookedUpFanouts))
+        results = dict((name, []) for name, fanouts in variants)
+        for repeat in range(FANOUT_REPEATS):
+            for name, fanouts in (variants if repeat % 2 else reversed(variants)):
+                for entry in entries:
+                    entry.fanout = fanouts[entry]
+                start = time.perf_counter()
+                fanout(telegrams)
+                results[name].append((time.perf_counter() - start) / len(telegrams) * 1e9)
+    print("{:<24} {:>12} {:>12}".format('GroupObject handles', 'min ns', 'median ns'))
+    for name, fanouts in variants:
+        print("{:<24} {:>12.0f} {:>12.0f}".format(name, min(results[name]), statistics.median(results[name])))
+
+
+BENCHMARKS = {
+    'decode': benchmarkDecode,
+    'knxprod': benchmarkKnxProd,
+    'memory': benchmarkMemory,
+    'fanout': benchmarkFanout,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('benchmarks', nargs='*', choices=list(BENCHMARKS), metavar='benchmark',
+                        help="one of {}".format(', '.join(BENCHMARKS)))
+    args = parser.parse_args()
+    # generating the knxprod logs every new GO
+    logging.basicConfig(level=logging.WARNING)
+    random.seed(1)
+    for name in args.benchmarks or BENCHMARKS:
+        print("# {}".format(name))
+        BENCHMARKS[name]()
+        print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
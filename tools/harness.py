@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG.
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG.  If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+"""
+Runs the plugin outside of SmartHomeNG, on the simulated stack and with stand-in items.
+
+The plugin has to be in plugins/knx_ets of a SmartHomeNG checkout, lib and bin are imported from there.
+Every Harness works in a temporary base directory of its own, the files of an installation are never touched.
+"""
+
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SHNG_DIR = os.path.dirname(os.path.dirname(PLUGIN_DIR))
+if SHNG_DIR not in sys.path:
+    sys.path.insert(0, SHNG_DIR)
+
+from lib.shyaml import yaml_load
+
+plugin = importlib.import_module('plugins.' + os.path.basename(PLUGIN_DIR))
+
+
+class Item:
+    """
+    Stand-in for an item of SmartHomeNG with the parts the plugin uses
+    """
+
+    def __init__(self, path, conf):
+        self.path = path
+        self.conf = conf
+        self.value = None
+        self.changes = 0
+
+    def id(self):
+        return self.path
+
+    def __str__(self):
+        return self.path
+
+    def __call__(self, value=None, caller='Logic', source=None, dest=None):
+        if value is None:
+            return self.value
+        self.value = value
+        self.changes += 1
+
+
+class Scheduler:
+    def add(self, *args, **kwargs):
+        pass
+
+    def remove(self, *args, **kwargs):
+        pass
+
+
+class SmartHome:
+    def __init__(self, baseDir):
+        self.base_dir = baseDir
+        self.scheduler = Scheduler()
+
+
+def pluginYaml():
+    return yaml_load(os.path.join(PLUGIN_DIR, 'plugin.yaml'))
+
+
+def attributeValue(value, attributeType):
+    """
+    Convert a value of an items file like SmartHomeNG does with the type from plugin.yaml
+    """
+    if attributeType.startswith('list'):
+        return value if isinstance(value, list) else [value]
+    if attributeType == 'bool':
+        return value if isinstance(value, bool) else str(value).lower() in ('1', 'true', 'yes', 'on')
+    if attributeType == 'int':
+        return int(value)
+    if attributeType == 'num':
+        return float(value)
+    return str(value)
+
+
+def loadItems(path, instance=''):
+    """
+    Stand-in items for the items of an items file of SmartHomeNG that have attributes of the plugin
+
+    :param instance: instance name of the attributes, '' for attributes without @instance
+    """
+    types = dict((name + ('@' + instance if instance else ''), definition['type'])
+                 for name, definition in pluginYaml()['item_attributes'].items())
+    items = []
+
+    def walk(node, prefix):
+        for key, value in node.items():
+            if not isinstance(value, dict):
+                continue
+            path = prefix + str(key)
+            conf = dict((str(name), attribute) for name, attribute in value.items() if not isinstance(attribute, dict))
+            if any(name in types for name in conf):
+                for name in conf:
+                    if name in types:
+                        conf[name] = attributeValue(conf[name], types[name])
+                items.append(Item(path, conf))
+            walk(value, path + '.')
+
+    walk(yaml_load(path) or {}, '')
+    return items
+
+
+class Harness:
+    """
+    A KnxEts instance on the simulated stack
+
+    :param parameters: plugin parameters, the defaults of plugin.yaml apply to the others
+    :param knxprod: knxprod of an installation to start from, so the GOs keep their numbers
+    """
+
+    def __init__(self, items, parameters=None, knxprod=None, instance=''):
+        self.items = items
+        self.baseDir = tempfile.mkdtemp(prefix='knx_ets.')
+        os.makedirs(os.path.join(self.baseDir, 'plugins'))
+        os.symlink(PLUGIN_DIR, os.path.join(self.baseDir, 'plugins', 'knx_ets'))
+        varDir = os.path.join(self.baseDir, 'var', 'knx_ets', instance)
+        os.makedirs(varDir)
+        if knxprod:
+            shutil.copyfile(knxprod, os.path.join(varDir, 'smarthomeNG.xml'))
+
+        self.plugin = plugin.KnxEts.__new__(plugin.KnxEts)
+        self.plugin._instance = instance
+        self.plugin._sh = SmartHome(self.baseDir)
+        self.plugin._parameters = dict((name, definition.get('default'))
+                                       for name, definition in pluginYaml()['parameters'].items())
+        self.plugin._parameters.update(parameters or {})
+        self.plugin._parameters['stack'] = 'simulated'
+        self.plugin._init_complete = True
+        # there is no http module to register the web interface with
+        self.plugin.init_webinterface = lambda: True
+        self.plugin.__init__(self.plugin._sh)
+        # SmartHomeNG does not load a plugin whose configuration was rejected
+        if self.plugin._init_complete:
+            for item in items:
+                self.plugin.parse_item(item)
+
+    def start(self):
+        if self.plugin._init_complete:
+            self.plugin.run()
+        return self.plugin.alive
+
+    def close(self):
+        if self.plugin.alive:
+            self.plugin.stop()
+        shutil.rmtree(self.baseDir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
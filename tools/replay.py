@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG.
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG.  If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+"""
+Replays a telegram log without SmartHomeNG and prints the statistics of the plugin as JSON.
+
+    python3 plugins/knx_ets/tools/replay.py items/knx.yaml var/knx_ets/telegrams.log --speed 0
+
+Exits with 1 if the replay did not get through the whole log, so it can run as a regression benchmark in CI.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+from harness import Harness, loadItems
+
+
+def parameter(text):
+    name, separator, value = text.partition('=')
+    if not separator:
+        raise argparse.ArgumentTypeError("expected NAME=VALUE, got '{}'".format(text))
+    try:
+        return name, json.loads(value)
+    except ValueError:
+        return name, value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('items', help="items file of SmartHomeNG with the knx_* attributes")
+    parser.add_argument('log', help="telegram log written with record_file")
+    parser.add_argument('--speed', type=float, default=0,
+                        help="factor on the recorded pace, 0 replays as fast as possible (default)")
+    parser.add_argument('--knxprod', help="smarthomeNG.xml of the installation, so the GOs keep their numbers")
+    parser.add_argument('--instance', default='', help="instance name of the attributes in the items file")
+    parser.add_argument('--set', dest='parameters', type=parameter, action='append', default=[],
+                        metavar='NAME=VALUE', help="plugin parameter, the value is read as JSON if it is valid JSON")
+    parser.add_argument('--verbose', action='store_true', help="show the log messages of the plugin")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    items = loadItems(args.items, args.instance)
+    with Harness(items, dict(args.parameters), args.knxprod, args.instance) as harness:
+        if not harness.start():
+            print("The plugin did not start, no GOs are bound", file=sys.stderr)
+            return 1
+        knxEts = harness.plugin
+        knxEts.startReplay(os.path.abspath(args.log), args.speed)
+        knxEts.replayer.thread.join()
+        # the statistics include the telegrams still queued for the items
+        while knxEts.dispatcher is not None and knxEts.dispatcher.statistics()['depth']:
+            time.sleep(0.01)
+        statistics = knxEts.statistics()
+    print(json.dumps(statistics, indent=2, default=str))
+    replay = statistics['replay']
+    return 0 if replay['finished'] and not replay['error'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG.
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG.  If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+"""
+Stress test of the plugin without SmartHomeNG, on the simulated stack and stand-in items.
+
+    python3 plugins/knx_ets/tools/stress.py --seconds 10 --set dispatch_workers=4
+
+Without an items file every DPT gets an item with a send, a listen and a status GO. Prints the result as JSON and
+exits with 1 unless the test passed.
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+
+from harness import Harness, Item, loadItems, plugin
+from replay import parameter
+
+dpts = plugin.dpts
+
+
+class StressTest:
+    """
+    Hammers a plugin running on the simulated stack from both sides at once.
+
+    One thread injects telegrams into random GOs as the stack thread would,
+    itemThreads threads change random items and hand them to update_item as
+    the item threads of SmartHomeNG would. Values are random payloads of the
+    size of the DPT that the decoder of the item accepts. Afterwards it
+    checks that no received telegram was lost in the counters, that all GOs
+    of an item hold the same value and that it is the value of the item, and
+    that none of the threads died.
+    """
+
+    def __init__(self, plugin, seconds=10, rate=0, itemThreads=4, name='knx_ets'):
+        self.logger = logging.getLogger(__name__)
+        self.plugin = plugin
+        self.seconds = seconds
+        self.rate = rate
+        self.itemThreads = max(1, itemThreads)
+        self.name = name
+        self.running = False
+
+        self.injected = 0
+        self.changed = []
+        self.errors = 0
+        self.failedThreads = []
+        self.elapsed = None
+        self.lostReceived = None
+        self.inconsistent = None
+
+    @staticmethod
+    def payload(binding, attempts=100):
+        """
+        :return: (random payload of the size of the DPT, its decoded value), (None, None) if no payload decoded
+        """
+        for i in range(attempts):
+            payload = os.urandom(max(1, binding.size))
+            try:
+                value = binding.decoder(payload)
+            except Exception:
+                continue
+            if value is not None:
+                return payload, value
+        return None, None
+
+    @staticmethod
+    def encode(binding, value):
+        """
+        :return: value encoded as the plugin sends it, None if the encoder does not take it
+        """
+        try:
+            return bytes(binding.encoder(value))
+        except Exception:
+            return None
+
+    def encodable(self, binding):
+        payload, value = self.payload(binding)
+        return payload is not None and self.encode(binding, value) is not None
+
+    def guarded(self, target, *args):
+        # a thread dying early would leave the test with fewer changes than it reports as load
+        try:
+            target(*args)
+        except Exception as e:
+            self.failedThreads.append(threading.current_thread().name)
+            self.logger.exception("{}: {} died: {}".format(self.name, threading.current_thread().name, e))
+
+    def inject(self, entries, deadline):
+        interval = 1.0 / self.rate if self.rate > 0 else 0
+        nextTime = time.perf_counter()
+        while self.running and time.perf_counter() < deadline:
+            entry = random.choice(entries)
+            payload, value = self.payload(entry.binding)
+            if payload is None:
+                continue
+            try:
+                self.plugin.knx.receive(entry.goNr, payload)
+            except Exception as e:
+                self.errors += 1
+                self.logger.warning("{}: injecting into GO {} failed: {}".format(self.name, entry.goNr, e))
+            self.injected += 1
+            if interval:
+                nextTime += interval
+                wait = nextTime - time.perf_counter()
+                if wait > 0:
+                    time.sleep(wait)
+
+    def change(self, index, bindings, deadline):
+        while self.running and time.perf_counter() < deadline:
+            binding = random.choice(bindings)
+            payload, value = self.payload(binding)
+            if payload is None or self.encode(binding, value) is None:
+                continue
+            try:
+                # set as knx_ets so the item does not call update_item by itself, then hand it over once
+                binding.item(value, 'knx_ets')
+                self.plugin.update_item(binding.item, 'stress')
+            except Exception as e:
+                self.errors += 1
+                self.logger.warning("{}: changing {} failed: {}".format(self.name, binding.item, e))
+            self.changed[index] += 1
+
+    def busy(self):
+        plugin = self.plugin
+        if plugin.dispatcher is not None and plugin.dispatcher.statistics()['depth']:
+            return True
+        if plugin.batcher is not None and plugin.batcher.pending:
+            return True
+        return plugin.sendScheduler is not None and plugin.sendScheduler.statistics()['depth'] > 0
+
+    def settle(self, timeout=10):
+        """
+        Wait until dispatcher, batcher and send scheduler have handed on everything
+        """
+        deadline = time.perf_counter() + timeout
+        time.sleep(0.2)
+        while self.busy() and time.perf_counter() < deadline:
+            time.sleep(0.1)
+        # the last values taken from the queues may still be in their handlers
+        time.sleep(0.2)
+
+    def inconsistency(self, binding):
+        """
+        :return: None if all GOs of binding hold the same value and it is the item value, else a description
+        """
+        with binding.lock:
+            values = set(bytes(entry.groupObject.value) for entry in binding.entries if entry.groupObject is not None)
+        if len(values) > 1:
+            return "{}: its GOs differ".format(binding.item)
+        value = values.pop()
+        if binding.item() is None and not value:
+            # neither changed nor received
+            return None
+        # a sent value is the encoded item value, a received one decodes to it
+        if self.encode(binding, binding.item()) == value:
+            return None
+        try:
+            decoded = binding.decoder(value)
+        except Exception:
+            decoded = None
+        if decoded != binding.item():
+            return "{}: GO {} but item {!r}".format(binding.item, value.hex(), binding.item())
+        return None
+
+    def run(self):
+        """
+        Run the test for the given seconds and check the state afterwards
+
+        :return: whether the test passed
+        """
+        self.running = True
+        # only GOs of items, the GOs of the clock have no item to compare with
+        bindings = [binding for binding in self.plugin.bindings
+                    if binding.groupObjects and self.plugin.bindingsByItem.get(binding.item) is binding]
+        entries = [entry for binding in bindings for entry in binding.entries if entry.groupObject is not None]
+        # items whose encoder does not take what their decoder returns only receive
+        changeable = [binding for binding in bindings if self.encodable(binding)]
+        if not entries:
+            self.logger.error("{}: no GOs to stress".format(self.name))
+            self.running = False
+            return False
+        receivedBefore = sum(entry.rx for entry in entries)
+
+        started = time.perf_counter()
+        deadline = started + self.seconds
+        self.changed = [0] * self.itemThreads
+        threads = [threading.Thread(target=self.guarded, args=(self.inject, entries, deadline),
+                                    name=self.name + ".stress.inject", daemon=True)]
+        if changeable:
+            threads.extend(threading.Thread(target=self.guarded, args=(self.change, i, changeable, deadline),
+                                            name="{}.stress.items{}".format(self.name, i), daemon=True)
+                           for i in range(self.itemThreads))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.elapsed = time.perf_counter() - started
+
+        self.settle()
+        if self.plugin.stats:
+            self.lostReceived = self.injected - (sum(entry.rx for entry in entries) - receivedBefore)
+        self.inconsistent = []
+        for binding in bindings:
+            problem = self.inconsistency(binding)
+            if problem is not None:
+                self.inconsistent.append(problem)
+        self.running = False
+        for problem in self.inconsistent:
+            self.logger.error("{}: {}".format(self.name, problem))
+        return self.passed()
+
+    def passed(self):
+        return (self.elapsed is not None and not self.failedThreads and not self.errors
+                and not self.lostReceived and not self.inconsistent)
+
+    def statistics(self):
+        changed = sum(self.changed)
+        finished = self.elapsed is not None and not self.running
+        return {
+            'seconds': self.seconds,
+            'item threads': self.itemThreads,
+            'telegrams injected': self.injected,
+            'item changes': changed,
+            'telegrams/s': round(self.injected / self.elapsed) if self.elapsed else None,
+            'item changes/s': round(changed / self.elapsed) if self.elapsed else None,
+            'errors': self.errors,
+            'failed threads': len(self.failedThreads),
+            'lost received': self.lostReceived,
+            'inconsistent items': None if self.inconsistent is None else len(self.inconsistent),
+            'first inconsistent': self.inconsistent[0] if self.inconsistent else None,
+            'finished': finished,
+            'passed': self.passed() if finished else None,
+        }
+
+
+def allDpts():
+    """
+    Stand-in items, one per DPT the plugin encodes, each with a send, a listen and a status GO
+    """
+    return [Item('stress.dpt{}'.format(dpt.replace('.', '_')),
+                 {'knx_dpt': dpt, 'knx_send': ['1/1/{}'.format(i)], 'knx_listen': ['1/2/{}'.format(i)],
+                  'knx_status': ['1/3/{}'.format(i)]})
+            for i, dpt in enumerate(sorted(dpts.encode), 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--items', help="items file of SmartHomeNG with the knx_* attributes, instead of one item "
+                                        "per DPT")
+    parser.add_argument('--seconds', type=float, default=10, help="duration of the test (default 10)")
+    parser.add_argument('--rate', type=float, default=0,
+                        help="telegrams per second injected into the stack, 0 as fast as possible (default)")
+    parser.add_argument('--threads', type=int, default=4, help="threads changing items (default 4)")
+    parser.add_argument('--instance', default='', help="instance name of the attributes in the items file")
+    parser.add_argument('--set', dest='parameters', type=parameter, action='append', default=[],
+                        metavar='NAME=VALUE', help="plugin parameter, the value is read as JSON if it is valid JSON")
+    parser.add_argument('--verbose', action='store_true', help="show the log messages of the plugin")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    items = loadItems(args.items, args.instance) if args.items else allDpts()
+    with Harness(items, dict(args.parameters), instance=args.instance) as harness:
+        if not harness.start():
+            print("The plugin did not start, no GOs are bound", file=sys.stderr)
+            return 1
+        stressTest = StressTest(harness.plugin, args.seconds, args.rate, args.threads)
+        passed = stressTest.run()
+    print(json.dumps(stressTest.statistics(), indent=2, default=str))
+    return 0 if passed else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG.
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG.  If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+import collections
+import time
+
+RX = 'rx'
+TX = 'tx'
+
+# types json can serialize as they are
+JSON_TYPES = (str, int, float, bool, type(None))
+
+
+def jsonValue(value):
+    """
+    :return: value as json can serialize it, dates and times in ISO format, everything else as string
+    """
+    if isinstance(value, JSON_TYPES):
+        return value
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if isinstance(value, (list, tuple)):
+        return [jsonValue(element) for element in value]
+    return str(value)
+
+
+class Tracer:
+    """
+    Ring buffer of the last size telegrams of the traced GOs.
+
+    Which GOs are traced is decided by the caller, which keeps a flag per
+    GO, so an untraced telegram costs a single flag check and never reaches
+    add(). Records are kept as tuples and only turned into dicts by dump(),
+    with the values converted to what json can serialize.
+    """
+
+    def __init__(self, size=1000):
+        self.records = collections.deque(maxlen=max(1, size))
+
+    def add(self, goNr, direction, rawValue, value):
+        self.records.append((time.time(), goNr, direction, bytes(rawValue), value))
+
+    def clear(self):
+        self.records.clear()
+
+    def dump(self):
+        """
+        :return: list of dicts of the records, newest first
+        """
+        return [{
+            'time': time.strftime('%H:%M:%S', time.localtime(timestamp)) + '.{:03d}'.format(int(timestamp * 1000) % 1000),
+            'go': goNr,
+            'direction': direction,
+            'raw': rawValue.hex(),
+            'value': jsonValue(value),
+        } for timestamp, goNr, direction, rawValue, value in reversed(list(self.records))]
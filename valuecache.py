@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG.
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG.  If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+import logging
+import mmap
+import os
+import struct
+import threading
+import zlib
+
+MAGIC = b'KNXV'
+VERSION = 1
+# magic, version, slot count, crc32 of the slot layout
+HEADER = struct.Struct('<4sHxxII')
+
+
+class ValueCache:
+    """
+    Last raw value per GO in a memory mapped file.
+
+    Every GO has a slot of fixed width: one length byte (0 means no value)
+    followed by width bytes of telegram data. The layout is derived from the
+    GO numbers and widths passed in, a file with another layout is discarded.
+    put() only remembers the value, flush() writes the values remembered
+    since the last flush into the file, so a GO changing many times between
+    two flushes costs one write.
+    """
+
+    def __init__(self, path, widths):
+        """
+        :param widths: dict GO number -> maximum length of the raw value
+        """
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        self.slots = {}
+        layout = []
+        offset = HEADER.size
+        for goNr in sorted(widths):
+            self.slots[goNr] = (offset, widths[goNr])
+            layout.append(struct.pack('<IH', goNr, widths[goNr]))
+            offset += 1 + widths[goNr]
+        self.length = offset
+        self.layout = zlib.crc32(b''.join(layout))
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.file = None
+        self.map = None
+
+        self.writes = 0
+        self.flushes = 0
+
+    def open(self):
+        """
+        Map the file, create or reset it if it does not match the layout
+
+        :return: dict GO number -> raw value of the GOs with a cached value
+        """
+        values = {}
+        if not self.slots:
+            return values
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        self.file = os.fdopen(fd, 'r+b')
+        valid = False
+        if os.fstat(fd).st_size == self.length:
+            header = HEADER.unpack(self.file.read(HEADER.size))
+            valid = header == (MAGIC, VERSION, len(self.slots), self.layout)
+            if not valid:
+                self.logger.info("{}: layout changed, discarding cached values".format(self.path))
+        if not valid:
+            self.file.seek(0)
+            self.file.truncate(0)
+            self.file.write(HEADER.pack(MAGIC, VERSION, len(self.slots), self.layout))
+            self.file.write(bytes(self.length - HEADER.size))
+            self.file.flush()
+        self.map = mmap.mmap(self.file.fileno(), self.length)
+
+        for goNr, (offset, width) in self.slots.items():
+            size = self.map[offset]
+            if 0 < size <= width:
+                values[goNr] = bytes(self.map[offset + 1:offset + 1 + size])
+        return values
+
+    def put(self, goNr, rawValue):
+        """
+        Remember the value of goNr for the next flush, called from the stack thread
+        """
+        if goNr in self.slots:
+            with self.lock:
+                self.pending[goNr] = rawValue
+
+    def flush(self):
+        if self.map is None or not self.pending:
+            return
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            for goNr, rawValue in pending.items():
+                offset, width = self.slots[goNr]
+                size = len(rawValue)
+                if size > width:
+                    continue
+                # the length byte is written last, it marks the slot as holding a value
+                self.map[offset + 1:offset + 1 + size] = rawValue
+                self.map[offset] = size
+                self.writes += 1
+            self.map.flush()
+            self.flushes += 1
+
+    def close(self):
+        self.flush()
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def statistics(self):
+        return {
+            'gos': len(self.slots),
+            'bytes': self.length,
+            'pending': len(self.pending),
+            'writes': self.writes,
+            'flushes': self.flushes,
+        }